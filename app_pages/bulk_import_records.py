@@ -0,0 +1,43 @@
+# Bulk Import page
+import streamlit as st
+from bulk_import import check_file, expected_columns, read_file, save_rows
+from login import require_login
+from storage import get_storage
+
+data_store = get_storage()
+
+# Show the page content only once logged in
+if require_login("login_form10"):
+    st.header("Bulk Import")
+    st.markdown("""
+    1. **Choose What You're Importing**: Products distributed, donated products or spoiled foods
+    2. **Upload a CSV File** with the columns listed below. Dates can be written as `2025-02-14` or `2/14/2025`, and quantities like in tab 1 (`2`, `0.75`, `3/4`, `1 1/2` or `2 crates`)
+    3. **Check the Problems**: Every row with a problem is listed at once. Fix them in the file and upload it again, or import just the rows without problems
+    4. **Note**: Multiple choices (e.g. several destinations for spoiled food) go in one cell separated by commas
+    """)
+
+    imports = {"Products Distributed": "products", "Donated Products": "donated", "Spoiled Foods": "spoiled"}
+    import_name = st.selectbox("What are you importing?", list(imports.keys()), key="bulk_import_name")
+    import_dataset = imports[import_name]
+    st.write("Columns:", ", ".join(expected_columns(import_dataset)))
+
+    uploaded_file = st.file_uploader("CSV file", type="csv", key=f"bulk_import_file_{import_dataset}")
+    if uploaded_file is not None:
+        try:
+            valid_rows, import_errors = check_file(import_dataset, read_file(uploaded_file))
+        except (ValueError, UnicodeDecodeError) as e:
+            st.error(f"Could not read the file: {e}")
+        else:
+            if import_errors.empty:
+                st.success(f"All {len(valid_rows)} rows look good.")
+            else:
+                st.warning(f"{import_errors['Row'].nunique()} rows have problems and will be skipped.")
+                st.dataframe(import_errors)
+
+            if st.button(f"Import {len(valid_rows)} valid rows", disabled=valid_rows.empty, key="bulk_import_button"):
+                # All valid rows are saved in one write
+                try:
+                    save_rows(data_store, import_dataset, valid_rows)
+                    st.success(f"{len(valid_rows)} rows imported to {data_store.location(import_dataset)}")
+                except ValueError as e:
+                    st.error(f"Error importing rows: {e}")
@@ -0,0 +1,51 @@
+# Data Spreadsheets page
+import streamlit as st
+from datetime import datetime, timedelta
+from login import require_login
+from planb_intake import get_planb_intake
+from storage import columns_of, get_storage
+
+data_store = get_storage()
+
+# Show the page content only once logged in
+if require_login("login_form8"):
+    st.header("Data Spreadsheet Overview")
+
+    files = {"Walk In Menu": "walk_in_menu", "Out of Stock Products": "removed_products", "Products Distributed": "products", "Donated Products": "donated", "Spoiled Foods": "spoiled",
+             "Menstrual Products": "menstrual", "Plan B Questionaire": "planB"}
+
+    # Only the chosen spreadsheet is loaded
+    name = st.selectbox("Choose a spreadsheet", list(files.keys()), key="spreadsheet_name")
+    dataset = files[name]
+    columns = columns_of(dataset)
+    if dataset == "planB" and get_planb_intake() is not None:
+        get_planb_intake().merge()  # Include responses that came in since the last merge
+
+    if not data_store.exists(dataset):
+        st.warning(f"No data available for {name}.")
+    else:
+        # Filtering by date only reads the rows in that range
+        if "Date" in columns and st.checkbox("Filter by date", key="spreadsheet_filter_dates"):
+            today = datetime.today().date()
+            date_range = st.date_input("Date range", value=(today - timedelta(days=30), today), key="spreadsheet_dates")
+            start = date_range[0] if date_range else today
+            end = date_range[-1] if date_range else today
+            data = data_store.read_range(dataset, start, end)
+        else:
+            data = data_store.read(dataset)
+
+        # Keep rows where a column contains some text
+        filter_column = st.selectbox("Filter by column", ["(No filter)"] + columns, key="spreadsheet_filter_column")
+        if filter_column != "(No filter)":
+            filter_text = st.text_input(f"Show rows where '{filter_column}' contains:", key="spreadsheet_filter_text")
+            if filter_text:
+                data = data[data[filter_column].astype(str).str.contains(filter_text, case=False, regex=False, na=False)]
+
+        # Send one page of rows to the browser at a time
+        page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1, key="spreadsheet_page_size")
+        page_count = max(1, -(-len(data) // page_size))
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1,
+                               key=f"spreadsheet_page_{dataset}")
+        first_row = (page - 1) * page_size
+        st.dataframe(data.iloc[first_row:first_row + page_size])
+        st.caption(f"Showing rows {min(first_row + 1, len(data))}-{min(first_row + page_size, len(data))} of {len(data)}")
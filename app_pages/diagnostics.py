@@ -0,0 +1,78 @@
+# Diagnostics page
+import json
+import streamlit as st
+import numpy as np
+import pandas as pd
+import instrumentation
+from storage import get_storage
+from login import require_login
+
+# Show the page content only once logged in
+if require_login("login_form11"):
+    st.header("Diagnostics")
+    st.markdown("""
+    1. **Turn Timing On**: Start the app with `PANTRY_TRACE=1` to time every file read and write, merge and page load
+    2. **Summary**: How many times each operation ran and how long it took (median, 95th percentile and slowest), with the rows and bytes it handled
+    3. **Histogram**: Choose an operation to see how its timings are spread out
+    """)
+
+    # Entries saved with PANTRY_WRITE_BEHIND=1 were confirmed before they reached the data
+    # files, so one that couldn't be written is only shown here
+    storage = get_storage()
+    failed = storage.failed_entries() if hasattr(storage, "failed_entries") else []
+    still_failing = st.session_state.pop("diagnostics_still_failing", None)
+    if still_failing == 0:
+        st.success("All entries that failed were written.")
+    elif still_failing:
+        st.warning(f"{still_failing} entries still couldn't be written.")
+    if failed:
+        st.error(f"{len(failed)} confirmed entries couldn't be written to the data files. Fix the cause "
+                 "(e.g. a data file with the wrong columns) and try them again, or discard them.")
+        st.dataframe(pd.DataFrame({
+            "Time": [failure["time"] for failure in failed],
+            "Entry": [json.dumps(failure["entry"]) if failure["entry"] is not None else failure["line"]
+                      for failure in failed],
+            "Error": [failure["error"] for failure in failed],
+        }))
+        retry_column, discard_column = st.columns(2)
+        if retry_column.button("Try Again", key="diagnostics_retry"):
+            st.session_state.diagnostics_still_failing = storage.retry_failed()
+            st.rerun()
+        if discard_column.button("Discard", key="diagnostics_discard"):
+            storage.discard_failed()
+            st.rerun()
+
+    if not instrumentation.ENABLED:
+        st.info("Timing is turned off. Start the app with PANTRY_TRACE=1 to turn it on.")
+
+    spans = instrumentation.read_log()
+    if spans.empty:
+        st.warning(f"Nothing has been timed yet ({instrumentation.LOG_PATH}).")
+    else:
+        for column in ["rows", "bytes"]:
+            if column not in spans.columns:
+                spans[column] = np.nan
+
+        # One line per operation
+        summary = spans.groupby("operation").agg(
+            count=("ms", "size"),
+            median_ms=("ms", "median"),
+            p95_ms=("ms", lambda ms: ms.quantile(0.95)),
+            max_ms=("ms", "max"),
+            total_ms=("ms", "sum"),
+            total_rows=("rows", "sum"),
+            total_bytes=("bytes", "sum"),
+        ).sort_values("total_ms", ascending=False)
+        st.write(f"### Summary ({len(spans)} timings since {spans['time'].min()})")
+        st.dataframe(summary.round(1))
+
+        operation = st.selectbox("Operation", list(summary.index), key="diagnostics_operation")
+        timings = spans.loc[spans["operation"] == operation, "ms"]
+        # Log-spaced buckets, so quick and slow runs both show up
+        edges = np.unique(np.geomspace(max(timings.min(), 0.01), max(timings.max(), 0.02), num=20).round(2))
+        counts = pd.cut(timings, bins=np.concatenate([[0], edges]), include_lowest=True).value_counts(sort=False)
+        histogram = pd.DataFrame({"ms": [f"≤ {edge:g}" for edge in edges], "Count": counts.to_numpy()})
+        st.bar_chart(histogram, x="ms", y="Count", x_label="Milliseconds", y_label="Count", sort=False)
+
+        st.write("### Slowest")
+        st.dataframe(spans[spans["operation"] == operation].nlargest(20, "ms"))
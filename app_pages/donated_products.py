@@ -0,0 +1,74 @@
+# Track Donated Products page
+import streamlit as st
+from datetime import datetime
+from form_options import donation_contents, donation_providers
+from login import require_login
+from storage import get_storage
+
+data_store = get_storage()
+
+# Show the page content only once logged in
+if require_login("login_form4"):
+    st.header("Track Donated Products")
+
+    # Date of donation
+    date = st.date_input("Date", value=datetime.today(), key="donated_date")
+    
+    # Input fields for donated products
+    product_name = st.text_input("Product Name", key="donated_product_name")
+    donation_weight = st.number_input("Donation Weight (lbs)", min_value=0.0, step=0.1, key="donation_weight")
+
+    donation_provider = st.selectbox(
+        "Donation Provider",
+        donation_providers,
+        key="donation_provider"
+    )
+
+    # Additional input if "Student Organization" or "Other" is selected
+    if donation_provider in ["Student Organization", "Other"]:
+        donor_details = st.text_input("If \"Student Organization\" or \"Other\", please list donator below:", key="donor_details")
+    else:
+        donor_details = ""
+
+    # Multi-select for contents
+    selected_contents = st.multiselect(
+        "Contents",
+        donation_contents,
+        key="donation_contents"
+    )
+
+    # Additional input if "Other" is selected in contents
+    if "Other" in selected_contents:
+        other_contents_details = st.text_input("If \"Other\", please specify contents:", key="other_contents_details")
+    else:
+        other_contents_details = ""
+
+    # Additional notes on contents
+    additional_notes = st.text_area("Additional Notes on Contents", key="additional_notes")
+
+    # Create a new entry for the donation
+    new_entry = {
+        "Date": date.strftime("%Y-%m-%d"),
+        "Product Name": product_name,
+        "Donation Weight (lbs)": donation_weight,
+        "Donation Provider": donation_provider,
+        "Donor Details": donor_details,
+        "Contents": ", ".join(selected_contents),
+        "Other Contents Details": other_contents_details,
+        "Additional Notes": additional_notes
+    }
+
+    # Submit button
+    submit_donation = st.button("Submit Donation")
+
+    # Save donation details if all fields are filled and the button is clicked
+    if submit_donation:
+        if product_name and donation_weight and donation_provider:
+            # Add the donation to the end of the CSV file
+            try:
+                data_store.append("donated", new_entry)
+                st.success(f"Donation details for '{product_name}' saved successfully!")
+            except ValueError as e:
+                st.error(f"Error saving donation: {e}")
+        else:
+            st.warning("Please fill out all required fields.")
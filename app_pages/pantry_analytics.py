@@ -0,0 +1,58 @@
+# Pantry Analytics page
+import pandas as pd
+import streamlit as st
+from datetime import datetime, timedelta
+from login import require_login
+from planb_intake import AGE_BANDS, STATS_COLUMNS, get_planb_intake, response_stats
+from rollups import GRANULARITIES, METRICS
+from storage import get_storage
+
+data_store = get_storage()
+
+# Show the page content only once logged in
+if require_login("login_form9"):
+    st.header("Pantry Analytics")
+    st.markdown("""
+    1. **Choose What to Show**: Products distributed, donation weight per provider, spoiled weight per destination or reason, or menstrual products per brand and type
+    2. **Choose the Period**: Totals per day, per week (starting Monday) or per month
+    3. **Note**: Totals update as soon as anything is submitted. An entry with several destinations or reasons counts towards each of them
+    """)
+
+    metric = st.selectbox("What to show", list(METRICS.keys()), key="analytics_metric")
+    granularity = st.radio("Totals per", GRANULARITIES, index=1, horizontal=True, key="analytics_granularity")
+    today = datetime.today().date()
+    date_range = st.date_input("Date range", value=(today - timedelta(days=90), today), key="analytics_dates")
+    start = date_range[0] if date_range else today
+    end = date_range[-1] if date_range else today
+
+    # Read from the running totals, not the raw spreadsheets
+    table = data_store.rollups.table(metric, granularity, start, end)
+    if table.empty:
+        st.info("No data for this date range yet.")
+    else:
+        group_columns = METRICS[metric]["groups"]
+        chart_data = table.assign(Group=table[group_columns].agg(" / ".join, axis=1)).pivot_table(
+            index="Period", columns="Group", values="Value", aggfunc="sum"
+        )
+        st.bar_chart(chart_data)
+        st.dataframe(table)
+
+    # Plan B questionnaire answers, counted as they come in (the responses aren't loaded)
+    st.subheader("Plan B Questionaire")
+    responses, counts = response_stats()
+    st.metric("Responses", responses)
+    rejected = get_planb_intake().rejected() if get_planb_intake() is not None else 0
+    if rejected:
+        st.warning(f"{rejected} responses couldn't be read and were set aside in "
+                   f"{get_planb_intake().rejected_path}.")
+    if responses:
+        question = st.selectbox("Answers to", STATS_COLUMNS, key="analytics_planb_question")
+        answers = pd.DataFrame(list(counts.get(question, {}).items()), columns=[question, "Responses"])
+        if question == "Age Band":
+            # Youngest first instead of the most common first
+            order = [label for low, label in AGE_BANDS] + ["Unknown"]
+            answers = answers.sort_values(question, key=lambda bands: bands.map(order.index))
+        st.bar_chart(answers.set_index(question))
+        st.dataframe(answers)
+        if question == "Barrier From Obtaining Plan B":
+            st.caption("A response naming several barriers counts towards each of them")
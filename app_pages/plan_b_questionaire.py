@@ -0,0 +1,67 @@
+# Plan B Questionaire page (open to everyone, no login)
+import streamlit as st
+from datetime import datetime
+from planb_intake import get_planb_intake
+from storage import get_storage
+
+data_store = get_storage()
+# Responses go to a file of this server thread's own, so many people can submit at once
+intake = get_planb_intake()
+
+st.header("Plan B Questionaire")
+
+# Automatically get current date and time
+current_datetime = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+age = st.number_input("How old are you?", min_value=0, step=1, key="age_key")
+gender = st.selectbox(
+    "What is your gender identity?", ["Male", "Female", "Other"], key="gender_key")
+if gender == "Other":
+    gender = st.text_input("Other:", key="other_gender_key")
+
+race = st.multiselect(
+    "Which of the following best describes your racial background?",
+    ["American Indian or Alaska Native", "Asian", "Black or African American", "Hispanic or Latino",
+     "Native Hawaiian or Other Pacific Islander", "White", "Two or More Races", "Other"],
+    key="race_key"
+)
+if "Other" in race:
+    race.remove("Other")
+    race.append(st.text_input("Other:", key="other_race_key"))
+
+finance = st.selectbox("Does the cost of Plan B present a financial challenge for you?",
+                       ["Yes", "Somewhat", "No"], key="finance_key")
+
+income = st.number_input("What is your annual income per year?")
+
+barrier = st.multiselect("What do you think is the main barrier of obtaining Plan B?",
+                        ["Cost", "Accessibility", "Stigma/Judgement", "Other"],
+                         key="barrier_key")
+if "Other" in barrier:
+    barrier.remove("Other")
+    barrier.append(st.text_area("Other:", key="other_barrier_key"))
+
+planB_button = st.button("Submit", key="planB_key")
+
+# Handle submission
+if planB_button:
+    # Create a new data entry
+    planB_Data = {
+        "Date": current_datetime,
+        "Age": age,
+        "Gender Identity": gender,
+        "Racial Background": ", ".join(race),
+        "Financial Background": finance,
+        "Annual Income": income,
+        "Barrier From Obtaining Plan B": ", ".join(barrier)
+    }
+    
+    # Saved straight away, and merged into the spreadsheet every half minute
+    try:
+        if intake is not None:
+            intake.submit(planB_Data)
+        else:
+            data_store.append("planB", planB_Data)
+        st.success("Products Saved Successfully!")
+    except ValueError as e:
+        st.error(f"Error saving questionaire: {e}")
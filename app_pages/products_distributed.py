@@ -0,0 +1,137 @@
+# Products Distributed page
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from bulk_import import check_file, save_rows
+from catalog import get_catalog
+from form_options import categories, count_methods
+from login import require_login
+from quantities import parse_quantity
+from storage import get_storage
+
+data_store = get_storage()
+catalog = get_catalog()
+
+# Initialize session state for category, product, and quantity if not already set
+if 'category' not in st.session_state:
+    st.session_state['category'] = list(categories.keys())[0]
+if 'product' not in st.session_state:
+    st.session_state['product'] = categories[st.session_state['category']][0]
+if 'quantity' not in st.session_state:
+    st.session_state['quantity'] = 0
+
+# Show the page content only once logged in
+if require_login("login_form1"):
+    st.header('Instructions for Adding Products')
+    st.markdown("""
+    1. **Select a Category** from the dropdown list
+    2. **Select a Product** or enter a custom product by selecting "Other (Custom Product)".
+    3. **Select How It Will be Counted**: Whether it be individually or by crates
+    4. **Enter the Quantity Distributed**: You can enter whole numbers for products that are easier to count. You may use fractions and mixed numbers (e.g., `0.75`, `3/4` or `1 1/2 crates`) to indicate how full the crates are for products that are harder to count like produce
+    5. Once you've entered the information, click **Submit** to save the data
+    6. **Many Products at Once**: Choose "Many products at once" to fill in a table with one row per product, then click **Submit All** to save every row together
+    """)
+
+    entry_mode = st.radio("Entry mode", ["One product", "Many products at once"], index=0, horizontal=True,
+                          key="entry_mode_tab1")
+
+    if entry_mode == "Many products at once":
+        # Rows are typed into a table and saved together with one write
+        if "batch_grid_version" not in st.session_state:
+            st.session_state.batch_grid_version = 0
+        batch_rows = st.data_editor(
+            pd.DataFrame({"Category": pd.Series(dtype=str), "Product": pd.Series(dtype=str),
+                          "Count Method": pd.Series(dtype=str), "Quantity": pd.Series(dtype=str)}),
+            num_rows="dynamic",
+            column_config={
+                "Category": st.column_config.SelectboxColumn("Category", options=list(categories.keys()), required=True),
+                "Product": st.column_config.TextColumn("Product", help="Any product name, including custom products",
+                                                       required=True),
+                "Count Method": st.column_config.SelectboxColumn("Count Method", options=count_methods,
+                                                                 default=count_methods[0], required=True),
+                "Quantity": st.column_config.TextColumn("Quantity", help="e.g. 2, 2.5 or 3/4", required=True),
+            },
+            key=f"batch_grid_{st.session_state.batch_grid_version}",
+        )
+
+        if st.button("Submit All", key="batch_submit_tab1"):
+            # Skip rows that were added but left empty
+            batch_rows = batch_rows.fillna("").astype(str).apply(lambda column: column.str.strip())
+            batch_rows = batch_rows[(batch_rows != "").any(axis=1)]
+            batch_rows.insert(0, "Date", datetime.today().strftime('%Y-%m-%d'))
+            valid_rows, batch_errors = check_file("products", batch_rows)
+
+            if batch_rows.empty:
+                st.warning("Please add at least one product.")
+            elif not batch_errors.empty:
+                # Row numbers in the table start at 1, not at the file's line 2
+                st.error("Nothing was saved. Please fix these rows:")
+                st.dataframe(batch_errors.assign(Row=batch_errors["Row"] - 1))
+            else:
+                save_rows(data_store, "products", valid_rows)  # Also adds custom product names to the catalog
+                st.session_state.batch_grid_version += 1  # Start the next batch with an empty table
+                st.success(f"{len(valid_rows)} products added.")
+
+    else:
+        # Select a category
+        category = st.selectbox(
+            "Select Category", 
+            options=list(categories.keys()), 
+            index=list(categories.keys()).index(st.session_state['category'])
+        )
+    
+        # If category has changed, reset the product to the first one of the new category
+        if category != st.session_state['category']:
+            st.session_state['category'] = category
+            st.session_state['product'] = categories[category][0]  # Reset product to the first one in new category
+
+        # Update list of products based on the selected category, including custom products
+        # other volunteers have added. Typing part of a name narrows the list
+        product_search = st.text_input("Search products (optional):", key="product_search_tab1")
+        products = catalog.search(category, product_search) if product_search else catalog.products(category)
+
+        # Select product
+        selected_product = st.selectbox(
+            f"Select a product from {category} or enter a custom product", 
+            options=products + ["Other (Custom Product)"],
+            index=products.index(st.session_state['product']) if st.session_state['product'] in products else 0,
+            key="product_select"
+        )
+
+        # Check if custom product is selected
+        if selected_product == "Other (Custom Product)":
+            custom_product_name = st.text_input("Enter custom product name:")
+        else:
+            custom_product_name = selected_product
+            st.session_state['product'] = custom_product_name  # Update the product in session state
+
+        # Add count method selection before entering quantity
+        count_method = st.radio("How it will be counted:", count_methods, index=0, key="count_method_tab1")
+    
+        # Input quantity (allowing fractions, mixed numbers like 1 1/2 and a unit like "2 crates")
+        initial_quantity_input = st.text_input("Quantity Distributed (You can enter fractions, e.g. 2.5 or 3/4):",
+                                               key="quantity_tab1")
+        initial_quantity, quantity_problem = 0, ""
+        if initial_quantity_input:
+            initial_quantity, quantity_unit, quantity_problem = parse_quantity(initial_quantity_input)
+            if quantity_unit and quantity_unit != count_method:
+                quantity_problem = f"says {quantity_unit} but the product is counted as {count_method}"
+            if quantity_problem:
+                st.error(f"The quantity '{initial_quantity_input}' {quantity_problem}.")
+
+        # Submit button
+        submit_button = st.button("Submit")
+
+        # Handle submission
+        if submit_button and quantity_problem:
+            st.warning("Nothing was saved. Please fix the quantity first.")
+        elif submit_button:
+            # Save custom product name to the catalog so every volunteer sees it (no duplicates)
+            if selected_product == "Other (Custom Product)":
+                catalog.add_product(category, custom_product_name)
+            
+            st.success(f"Product '{custom_product_name}' in category '{category}' added with initial quantity: {initial_quantity}")
+
+            # Add the quantity to today's record for this product (only today's rows are rewritten)
+            today = datetime.today().strftime('%Y-%m-%d')  # Get today's date
+            data_store.add_distributed(today, category, custom_product_name, count_method, initial_quantity)
@@ -0,0 +1,88 @@
+# Products Left (EoD) page
+import streamlit as st
+from datetime import datetime
+from catalog import get_catalog
+from form_options import categories, count_methods
+from login import require_login
+from quantities import parse_quantity
+from storage import get_storage
+
+data_store = get_storage()
+catalog = get_catalog()
+
+# Show the page content only once logged in
+if require_login("login_form2"):
+    st.header('Instructions for Updating Products Left at the End of the Day')
+    st.markdown("""
+    1. **Select a Category**: Choose the category of the product you want to update from the dropdown
+    2. **Select a Product**: Select a product or enter a custom product by selecting "Other (Custom Product)"
+    3. **Select How It Will be Counted**: Whether it be individually or by crates  
+    4. **Enter the Remaining Quantity**: Input the quantity of the selected product that is left at the end of the day. Like tab 1, you can enter both whole numbers, fractions or mixed numbers (e.g., `0.75`, `3/4` or `1 1/2`) for products distributed in crates
+    5. Once you've entered the remaining quantity, click **Update Quantities** to save the data
+    6. The total quantity distributed will automatically update, reflecting the total products distributed per day
+    7. **Note**: If the products left exceed the total quantity distributed, an error will be shown
+    """)
+
+    if not data_store.exists("products"):
+        st.warning("No data available.")
+    else:
+        # Select category and product for updating remaining quantity
+        category_tab2 = st.selectbox(
+            "Select Category for Products Left",
+            options=list(categories.keys())
+        )
+        
+        # Update list of products based on selected category, including custom products.
+        # The catalog keeps every category's list sorted already
+        product_search_tab2 = st.text_input("Search products (optional):", key="product_search_tab2")
+        if product_search_tab2:
+            products_tab2 = catalog.search(category_tab2, product_search_tab2)
+        else:
+            products_tab2 = catalog.products(category_tab2)
+
+        # Select product with "Other (Custom Product)" option
+        selected_product_tab2 = st.selectbox(
+            f"Select a product from {category_tab2} to update the remaining quantity:",
+            options=products_tab2
+        )
+
+        # Check if custom product is selected
+        if selected_product_tab2 == "Other (Custom Product)":
+            custom_product_name_tab2 = st.text_input("Enter custom product name:")
+        else:
+            custom_product_name_tab2 = selected_product_tab2
+            
+        # Add count method selection before entering quantity left
+        count_method_tab2 = st.radio("How it will be counted:", count_methods, index=0, key="count_method_tab2")
+        
+        # Input the "Products Left" quantity (fractions allowed)
+        products_left_input = st.text_input(
+            f"Enter the number of '{custom_product_name_tab2}' left at the end of the day (fractions allowed):",
+            key="products_left_tab2"
+        )
+        products_left, products_left_problem = 0, ""
+        if products_left_input:
+            products_left, products_left_unit, products_left_problem = parse_quantity(products_left_input)
+            if products_left_unit and products_left_unit != count_method_tab2:
+                products_left_problem = f"says {products_left_unit} but the product is counted as {count_method_tab2}"
+            if products_left_problem:
+                st.error(f"The quantity '{products_left_input}' {products_left_problem}.")
+
+        # Submit button for updating the quantities
+        update_button = st.button("Update Quantities")
+
+        if update_button and not custom_product_name_tab2:
+            st.warning("No product matches the search. Please search for another product.")
+        elif update_button and products_left_problem:
+            st.warning("Nothing was saved. Please fix the quantity first.")
+        elif update_button:
+            # Get today's date
+            today_date = datetime.today().strftime('%Y-%m-%d')
+
+            # Set the count on today's record for this product and count method. Only today's
+            # rows are looked up and rewritten; the file isn't read until this button is clicked
+            data_store.set_product_left(today_date, category_tab2, custom_product_name_tab2, count_method_tab2,
+                                        products_left)
+
+            st.success(f"Quantity for '{custom_product_name_tab2}' updated successfully!")
+            st.info(f"The data has been updated and saved to: {data_store.location('products')}")
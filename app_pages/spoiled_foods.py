@@ -0,0 +1,107 @@
+# Track Spoiled Foods page
+import streamlit as st
+from datetime import datetime
+from form_options import spoiled_contents, spoiled_destinations, spoiled_reasons, spoiled_sources
+from login import require_login
+from storage import get_storage
+
+data_store = get_storage()
+
+# Show the page content only once logged in
+if require_login("login_form5"):
+    st.header("Track Spoiled Foods")
+
+    # Date of spoilage
+    date = st.date_input("Date", value=datetime.today(), key="spoiled_date")
+
+    # Input total item weight
+    total_weight = st.number_input("Total Item Weight (lbs.)", min_value=0.0, step=0.1, key="spoiled_total_weight")
+
+    # Source of items (multi-select)
+    source_of_items = st.multiselect(
+        "Source of Items (Select all that apply)",
+        spoiled_sources,
+        key="spoiled_source_of_items"
+    )
+
+    # Additional input if "Other" or "Student Organization" is selected
+    if "Other" in source_of_items or "Student Organization (Please specify in 'Other')" in source_of_items:
+        source_details = st.text_input("If 'Other' or 'Student Organization', please specify:", key="spoiled_source_details")
+    else:
+        source_details = ""
+
+    # Contents (multi-select)
+    contents = st.multiselect(
+        "Contents (Select all that apply)",
+        spoiled_contents,
+        key="spoiled_contents"
+    )
+
+    # Additional input if "Other" is selected in contents
+    if "Other" in contents:
+        contents_details = st.text_input("If 'Other', please specify contents:", key="spoiled_contents_details")
+    else:
+        contents_details = ""
+
+    # Additional notes about contents
+    additional_notes_contents = st.text_area("Additional Notes about Contents", key="spoiled_additional_notes_contents")
+
+    # Destination of items
+    destination = st.multiselect(
+        "Where are these items going to?",
+        spoiled_destinations,
+        key="spoiled_destination"
+    )
+
+    # Additional input if "Other" is selected in destination
+    if "Other" in destination:
+        destination_details = st.text_input("If 'Other', please specify destination:", key="spoiled_destination_details")
+    else:
+        destination_details = ""
+
+    # Reasons why items can't be distributed (multi-select)
+    reasons = st.multiselect(
+        "Reason(s) why We Can't Distribute It (Select all that apply)",
+        spoiled_reasons,
+        key="spoiled_reasons"
+    )
+
+    # Additional input if "Other" is selected in reasons
+    if "Other" in reasons:
+        reasons_details = st.text_input("If 'Other', please specify reasons:", key="spoiled_reasons_details")
+    else:
+        reasons_details = ""
+
+    # Additional notes
+    additional_notes = st.text_area("Additional Notes?", key="spoiled_additional_notes")
+
+    # Create a new entry for the spoiled food
+    new_entry = {
+        "Date": date.strftime("%Y-%m-%d"),
+        "Total Item Weight (lbs.)": total_weight,
+        "Source of Items": ", ".join(source_of_items),
+        "Source Details": source_details,
+        "Contents": ", ".join(contents),
+        "Contents Details": contents_details,
+        "Additional Notes about Contents": additional_notes_contents,
+        "Destination": ", ".join(destination),
+        "Destination Details": destination_details,
+        "Reasons": ", ".join(reasons),
+        "Reasons Details": reasons_details,
+        "Additional Notes": additional_notes
+    }
+
+    # Submit button
+    submit_spoiled = st.button("Submit Spoiled Food")
+
+    # Save spoiled food details if all fields are filled and the button is clicked
+    if submit_spoiled:
+        if total_weight and source_of_items and contents and destination and reasons:
+            # Add the spoiled food to the end of the CSV file
+            try:
+                data_store.append("spoiled", new_entry)
+                st.success("Spoiled food details saved successfully!")
+            except ValueError as e:
+                st.error(f"Error saving spoiled food: {e}")
+        else:
+            st.warning("Please fill out all required fields.")
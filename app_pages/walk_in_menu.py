@@ -0,0 +1,37 @@
+# Walk In Menu page
+import streamlit as st
+from login import require_login
+from storage import get_storage
+
+data_store = get_storage()
+
+# Show the page content only once logged in
+if require_login("login_form3"):
+    st.header('Instructions Walk In Menu')
+    st.markdown("""
+    1. **Products Currently In Stock**: Products currently stocked will be shown here
+    2. **Remove Products That Are No Longer In Stock**: Do this by clicking the "Remove" button
+    3. **Note**: After a product is removed it will no longer show on the Walk In Menu
+    """)
+
+    # The menu is kept up to date by the storage layer as products are added and
+    # removed, so showing it doesn't touch the CSV files
+    walk_in_menu_view = data_store.walk_in_menu
+
+    # Display walk-in menu
+    st.write("### Walk-In Menu:")
+    for product in walk_in_menu_view.products():
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write(f"- **{product}**")
+        with col2:
+            button_key = f"remove_{product}"
+            if st.button(f"REMOVE {product}", key=button_key):
+                try:
+                    walk_in_menu_view.remove(product, session=st.session_state.session_id)
+                    st.success(f"Product '{product}' removed from walk-in menu.")
+                except Exception as e:
+                    st.error(f"Error saving removed products: {e}")
+
+    st.write("### All Products From Today", walk_in_menu_view.products())
+    st.write("### Products That Are No Longer In Stock", walk_in_menu_view.removed())
@@ -0,0 +1,87 @@
+# Cold history archive
+#
+# Months that are closed (older than a set number of months) can be moved out of the
+# CSV files into one compressed Parquet file per dataset and month:
+#   archive/products/2024-03.parquet, archive/donated/2024-03.parquet, ...
+# The CSV files then only hold recent rows, so everyday reads and writes parse much
+# less. CsvStorage reads both tiers together, so pages see the same data either way.
+# See CsvStorage.compact, which moves the rows, and run it with:
+#   python storage.py compact [MONTHS]
+#
+# Archiving needs pyarrow (pip install pyarrow). Without it the app keeps working on
+# the CSV files alone.
+#
+# Rows are moved a file at a time. The CSV file is first set aside under a name with an
+# id of its own (see CsvStorage._finish_archiving), and each archive file remembers the
+# id of every batch of rows that was moved into it. If a move is interrupted, the next
+# run sees which batches are already archived and only finishes the rest, so running
+# compaction again is always safe. A later file with the very same rows (the same late
+# entry made twice) has another id, so it's archived like any other.
+import json
+import os
+import tempfile
+
+from instrumentation import span
+from schemas import apply_types, columns_of
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+ARCHIVE_DIRECTORY = "archive"
+BATCHES_KEY = b"pantry_batches"  # Key of the batch list in the Parquet file's metadata
+
+
+def archive_available():
+    return pq is not None
+
+
+def read_archive(path, name, compact=True):
+    """Read an archive file of dataset `name` with the dataset's column types.
+
+    Rows are archived exactly as read with compact=False (see schemas.dtypes), which is
+    also what compact=False returns, for rows that get added to and written back.
+    """
+    with span("read archive", file=os.path.basename(path), bytes=os.path.getsize(path)) as timing:
+        data = pq.read_table(path).to_pandas().reindex(columns=columns_of(name))
+        timing.set(rows=len(data))
+    return apply_types(name, data) if compact else data
+
+
+def archived_batches(path):
+    # [{"source": id of the file the rows came from, "rows": ...}] of every batch moved
+    # into `path`, oldest first
+    if not os.path.exists(path):
+        return []
+    metadata = pq.read_schema(path).metadata or {}
+    return json.loads(metadata.get(BATCHES_KEY, b"[]"))
+
+
+def already_archived(source, batches):
+    # Whether the rows of the file with id `source` are in the archive file already
+    return any(batch.get("source") == source for batch in batches)
+
+
+def write_archive(path, data, batches):
+    # Write to a temporary file next to the real one and swap it in, like write_csv_atomic
+    from storage import keep_permissions  # storage imports this module, so not at the top
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), BATCHES_KEY: json.dumps(batches).encode()})
+    handle, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".parquet", dir=directory)
+    try:
+        with span("write archive", file=os.path.basename(path), rows=len(data)) as timing:
+            with os.fdopen(handle, "wb") as f:
+                pq.write_table(table, f, compression="zstd")
+                f.flush()
+                os.fsync(f.fileno())
+                timing.set(bytes=f.tell())
+            keep_permissions(temp_path, path)
+            os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
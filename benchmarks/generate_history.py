@@ -0,0 +1,195 @@
+# Synthetic pantry history for the benchmarks
+#
+# Writes three years of made-up but realistic data for every dataset (products
+# distributed, donations, spoiled food, menstrual products, Plan B answers and out of
+# stock removals), with the same seed always giving the same files. The files are
+# written through CsvStorage, so they end up in the same layout the app uses (monthly
+# product files and so on).
+#   python benchmarks/generate_history.py ROWS DIRECTORY [--seed 1]
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from form_options import (categories, count_methods, donation_contents, donation_providers, spoiled_contents,
+                          spoiled_destinations, spoiled_reasons, spoiled_sources)
+from storage import CsvStorage
+
+YEARS = 3
+
+MENSTRUAL_PRODUCTS = {
+    "Organic Initiative": ["Regular Pads", "Super Pads", "Overnight Pads", "Light Tampons", "Regular Tampons",
+                           "Super Tampons", "Super Plus Tampons", "Panty Liners"],
+    "Aunt Flow": ["Pads", "Tampons"],
+    "June": ["Small Menstrual Cups", "Large Menstrual Cups"],
+    "Saalt": ["Small Menstrual Cups", "Large Menstrual Cups", "Small Menstrual Discs", "Large Menstrual Discs"],
+    "Donated": ["Panty Liners", "Pads", "Tampons", "Cups", "Disks"],
+}
+
+
+def history_days():
+    # Every day of the last three years, ending today (the walk in menu needs today's rows)
+    today = datetime.today().date()
+    return pd.date_range(today - timedelta(days=365 * YEARS - 1), today, freq="D")
+
+
+def random_days(rng, rows):
+    # `rows` dates spread over the history, in date order
+    days = history_days()
+    return np.sort(rng.choice(days.strftime("%Y-%m-%d").to_numpy(), rows))
+
+
+def random_times(rng, rows):
+    # "YYYY-MM-DD HH:MM:SS" during opening hours, in order
+    dates = pd.to_datetime(random_days(rng, rows))
+    seconds = rng.integers(9 * 3600, 18 * 3600, rows)
+    times = (dates + pd.to_timedelta(seconds, unit="s")).sort_values()
+    return pd.Series(times).dt.strftime("%Y-%m-%d %H:%M:%S").to_numpy()
+
+
+def random_choices(rng, options, rows, most=2):
+    # Multiselect answers: one to `most` different `options` joined with ", "
+    options = np.array(options, dtype=object)
+    picks = options[np.argsort(rng.random((rows, len(options))), axis=1)[:, :most]]
+    counts = rng.integers(1, most + 1, rows)
+    answers = picks[:, 0].copy()
+    for column in range(1, most):
+        more = counts > column
+        answers[more] = answers[more] + ", " + picks[more, column]
+    return answers
+
+
+def products_history(rng, rows):
+    # One row per (day, category, product, count method), like the merged records the app
+    # keeps. Busy days get extra custom products so the row count is reached
+    days = history_days().strftime("%Y-%m-%d")
+    # The same number of rows every day, with the remainder on the most recent days
+    rows_per_day = np.full(len(days), rows // len(days))
+    rows_per_day[len(days) - rows % len(days):] += 1
+    per_day = int(rows_per_day.max())
+    keys = [(category, product, method) for category, items in categories.items() for product in items
+            for method in count_methods]
+    custom = max(0, per_day - len(keys))
+    category_names = list(categories)
+    keys += [(category_names[i % len(category_names)], f"Custom Product {i}", count_methods[i % 2])
+             for i in range(custom)]
+
+    chosen = np.concatenate([rng.choice(len(keys), count, replace=False) for count in rows_per_day])
+    key_frame = pd.DataFrame([keys[i] for i in chosen], columns=["Category", "Product", "Count Method"])
+    distributed = np.where(key_frame["Count Method"] == "Crates", rng.integers(1, 16, rows) / 4,
+                           rng.integers(1, 60, rows)).astype(float)
+    left = np.floor(distributed * rng.random(rows) * 4) / 4
+    data = pd.DataFrame({"Date": np.repeat(days, rows_per_day)})
+    data = pd.concat([data, key_frame], axis=1)
+    data["Product Distributed"] = distributed
+    data["Product Left"] = left
+    data["Total Product Distributed"] = distributed - left
+    return data
+
+
+def donated_history(rng, rows):
+    providers = rng.choice(donation_providers, rows)
+    return pd.DataFrame({
+        "Date": random_days(rng, rows),
+        "Product Name": rng.choice(["Bread", "Produce box", "Canned goods", "Milk", "Snacks", "Toiletries"], rows),
+        "Donation Weight (lbs)": np.round(rng.gamma(2.0, 15.0, rows), 1),
+        "Donation Provider": providers,
+        "Donor Details": np.where(np.isin(providers, ["Student Organization", "Other"]), "Campus club", ""),
+        "Contents": random_choices(rng, donation_contents, rows),
+        "Other Contents Details": "",
+        "Additional Notes": "",
+    })
+
+
+def spoiled_history(rng, rows):
+    return pd.DataFrame({
+        "Date": random_days(rng, rows),
+        "Total Item Weight (lbs.)": np.round(rng.gamma(2.0, 4.0, rows), 1),
+        "Source of Items": random_choices(rng, spoiled_sources, rows),
+        "Source Details": "",
+        "Contents": random_choices(rng, spoiled_contents, rows, most=3),
+        "Contents Details": "",
+        "Additional Notes about Contents": "",
+        "Destination": random_choices(rng, spoiled_destinations, rows),
+        "Destination Details": "",
+        "Reasons": random_choices(rng, spoiled_reasons, rows),
+        "Reasons Details": "",
+        "Additional Notes": "",
+    })
+
+
+def menstrual_history(rng, rows):
+    brands = rng.choice(list(MENSTRUAL_PRODUCTS), rows)
+    product_types = np.empty(rows, dtype=object)
+    for brand, types in MENSTRUAL_PRODUCTS.items():
+        product_types[brands == brand] = rng.choice(types, (brands == brand).sum())
+    return pd.DataFrame({
+        "Date": random_times(rng, rows),
+        "Brand": brands,
+        "Product Type": product_types,
+        "Quantity": rng.integers(1, 4, rows),
+    })
+
+
+def planB_history(rng, rows):
+    return pd.DataFrame({
+        "Date": random_times(rng, rows),
+        "Age": rng.integers(17, 40, rows),
+        "Gender Identity": rng.choice(["Female", "Male", "Other"], rows, p=[0.8, 0.15, 0.05]),
+        "Racial Background": rng.choice(["Asian", "White", "Hispanic or Latino", "Black or African American",
+                                         "Two or More Races"], rows),
+        "Financial Background": rng.choice(["Yes", "Somewhat", "No"], rows),
+        "Annual Income": np.round(rng.gamma(1.5, 12000, rows), -2),
+        "Barrier From Obtaining Plan B": random_choices(rng, ["Cost", "Accessibility", "Stigma/Judgement"], rows),
+    })
+
+
+def removed_history(rng, rows, products):
+    # REMOVE clicks for about a quarter of the products on each day's menu. Nothing is
+    # removed today, so the walk in menu has products to show
+    earlier = np.flatnonzero(products["Date"].to_numpy() < datetime.today().strftime("%Y-%m-%d"))
+    picks = products.iloc[np.sort(rng.choice(earlier, min(rows, len(earlier)) // 4, replace=False))]
+    times = pd.to_datetime(picks["Date"]) + pd.to_timedelta(rng.integers(9 * 3600, 18 * 3600, len(picks)), unit="s")
+    return pd.DataFrame({
+        "Product": picks["Product"].to_numpy(),
+        "Date": picks["Date"].to_numpy(),
+        "Timestamp": times.dt.strftime("%Y-%m-%d %H:%M:%S").to_numpy(),
+        "Session": [f"{value:08x}" for value in rng.integers(0, 2 ** 32, len(picks))],
+    }).drop_duplicates(["Product", "Date"])
+
+
+def generate(rows, directory, seed=1):
+    """Write `rows` rows of every dataset into `directory` (which should be empty)."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+    files = CsvStorage(directory)
+    products = products_history(rng, rows)
+    datasets = {
+        "products": products,
+        "donated": donated_history(rng, rows),
+        "spoiled": spoiled_history(rng, rows),
+        "menstrual": menstrual_history(rng, rows),
+        "planB": planB_history(rng, rows),
+        "removed_products": removed_history(rng, rows, products),
+    }
+    for name, data in datasets.items():
+        files.replace(name, data)
+    files.rollups.save()  # Don't leave the totals to the background timer
+    return {name: len(data) for name, data in datasets.items()}
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    seed = 1
+    if "--seed" in arguments:
+        seed = int(arguments.pop(arguments.index("--seed") + 1))
+        arguments.remove("--seed")
+    if len(arguments) != 2:
+        print("usage: python benchmarks/generate_history.py ROWS DIRECTORY [--seed 1]")
+        sys.exit(1)
+    for name, count in generate(int(arguments[0]), arguments[1], seed).items():
+        print(f"{name}: {count} rows")
@@ -0,0 +1,253 @@
+# Per-page rerun and submit latency with a large synthetic history
+#
+# For every history size, each page is opened headlessly with Streamlit's AppTest in its
+# own process (on a fresh copy of the generated data) and measured:
+#   - first_run_ms: opening the page for the first time
+#   - rerun_ms: p50/p95 of rerunning the page without changing anything
+#   - submit_ms: p50/p95 of the page's main action (a form submit, or a choice on the
+#     read-only pages)
+#   - peak_memory_mb: the process's peak resident memory
+# Generated data is kept in benchmarks/data/ and reused. Results are saved as JSON
+# under benchmarks/results/, named after the commit, and two result files can be
+# compared:
+#   python benchmarks/run_benchmarks.py [--sizes 10000,100000,1000000] [--reruns 20] [--submits 5]
+#   python benchmarks/run_benchmarks.py --compare OLD.json NEW.json
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, BENCHMARKS)
+
+from generate_history import generate  # noqa: E402
+
+SEED = 1
+
+
+def select_first(at, key):
+    at.multiselect(key=key).select(at.multiselect(key=key).options[0])
+
+
+# Page script -> what its main action is. Each one changes the inputs and returns the
+# button to click, or None when the change itself is the action
+def submit_products_distributed(at):
+    at.text_input(key="quantity_tab1").input("2")
+    return "Submit"
+
+
+def submit_products_left(at):
+    at.text_input(key="products_left_tab2").input("1")
+    return "Update Quantities"
+
+
+def submit_walk_in_menu(at):
+    return at.button[0].label if at.button else None
+
+
+def submit_donated_products(at):
+    at.text_input(key="donated_product_name").input("Bread")
+    at.number_input(key="donation_weight").set_value(5.0)
+    return "Submit Donation"
+
+
+def submit_spoiled_foods(at):
+    at.number_input(key="spoiled_total_weight").set_value(2.0)
+    for key in ["spoiled_source_of_items", "spoiled_contents", "spoiled_destination", "spoiled_reasons"]:
+        if not at.multiselect(key=key).value:
+            select_first(at, key)
+    return "Submit Spoiled Food"
+
+
+def submit_menstrual_products(at):
+    return "Submit"
+
+
+def submit_plan_b_questionaire(at):
+    return "Submit"
+
+
+def submit_data_spreadsheets(at):
+    # Switch between the largest spreadsheets
+    box = at.selectbox(key="spreadsheet_name")
+    box.select("Products Distributed" if box.value != "Products Distributed" else "Spoiled Foods")
+    return None
+
+
+def submit_pantry_analytics(at):
+    radio = at.radio(key="analytics_granularity")
+    radio.set_value("Daily" if radio.value != "Daily" else "Monthly")
+    return None
+
+
+PAGES = {
+    "products_distributed.py": submit_products_distributed,
+    "products_left.py": submit_products_left,
+    "walk_in_menu.py": submit_walk_in_menu,
+    "donated_products.py": submit_donated_products,
+    "spoiled_foods.py": submit_spoiled_foods,
+    "menstrual_products.py": submit_menstrual_products,
+    "plan_b_questionaire.py": submit_plan_b_questionaire,
+    "data_spreadsheets.py": submit_data_spreadsheets,
+    "pantry_analytics.py": submit_pantry_analytics,
+    "bulk_import_records.py": None,  # Needs a file upload, which AppTest can't do
+}
+
+
+def percentiles(timings):
+    if not timings:
+        return None
+    return {"p50": float(np.percentile(timings, 50)), "p95": float(np.percentile(timings, 95))}
+
+
+def timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise SystemExit(f"The page raised an exception: {at.exception[0].message}")
+    return elapsed
+
+
+def measure_page(page, reruns, submits):
+    # Runs in its own process, with the working directory set to a copy of the data
+    sys.path.insert(0, REPOSITORY)
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(REPOSITORY, "Pantry_Tracking_Website.py"), default_timeout=600)
+    at.session_state.authenticated = True
+    at.switch_page(f"app_pages/{page}")
+    first_run = timed_run(at)
+    rerun_timings = [timed_run(at) for _ in range(reruns)]
+
+    submit_timings = []
+    if PAGES[page] is not None:
+        for _ in range(submits):
+            button = PAGES[page](at)
+            if button is not None:
+                at.button[[widget.label for widget in at.button].index(button)].click()
+            submit_timings.append(timed_run(at))
+
+    print(json.dumps({"first_run_ms": first_run, "rerun_ms": percentiles(rerun_timings),
+                      "submit_ms": percentiles(submit_timings), "peak_memory_mb": peak_memory_mb()}))
+
+
+def peak_memory_mb():
+    # On Linux ru_maxrss carries over from the parent process, so read this process's
+    # own high-water mark where it's available
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024  # Bytes on macOS, KB elsewhere
+
+
+def history_directory(rows):
+    # Generated once per size and seed, then reused
+    directory = os.path.join(BENCHMARKS, "data", f"{rows}-seed{SEED}-{datetime.today().date()}")
+    if not os.path.exists(directory):
+        print(f"Generating {rows} rows of history...", flush=True)
+        generate(rows, directory + ".tmp", SEED)
+        os.replace(directory + ".tmp", directory)
+    return directory
+
+
+def run_page(page, data_directory, reruns, submits):
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copytree(data_directory, directory, dirs_exist_ok=True)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--page", page, str(reruns), str(submits)],
+            cwd=directory, capture_output=True, text=True
+        )
+    if output.returncode != 0:
+        raise SystemExit(f"{page} failed:\n{output.stdout}{output.stderr}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPOSITORY, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_all(sizes, reruns, submits):
+    results = {
+        "commit": current_commit(),
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "seed": SEED,
+        "reruns": reruns,
+        "submits": submits,
+        "sizes": {},
+    }
+    for rows in sizes:
+        data_directory = history_directory(rows)
+        results["sizes"][str(rows)] = {}
+        for page in PAGES:
+            result = run_page(page, data_directory, reruns, submits)
+            results["sizes"][str(rows)][page] = result
+            submit = f"{result['submit_ms']['p50']:8.0f}" if result["submit_ms"] else "       -"
+            print(f"{rows:>8} {page:<28} rerun p50 {result['rerun_ms']['p50']:7.0f} ms  "
+                  f"p95 {result['rerun_ms']['p95']:7.0f} ms  submit p50 {submit} ms  "
+                  f"peak {result['peak_memory_mb']:6.0f} MB", flush=True)
+
+    os.makedirs(os.path.join(BENCHMARKS, "results"), exist_ok=True)
+    output_path = os.path.join(BENCHMARKS, "results", f"{results['commit']}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved to {output_path}")
+
+
+def flatten(results):
+    # {(rows, page, metric): value} for every number in a results file
+    values = {}
+    for rows, pages in results["sizes"].items():
+        for page, result in pages.items():
+            values[(rows, page, "first_run_ms")] = result["first_run_ms"]
+            values[(rows, page, "peak_memory_mb")] = result["peak_memory_mb"]
+            for metric in ["rerun_ms", "submit_ms"]:
+                for percentile, value in (result[metric] or {}).items():
+                    values[(rows, page, f"{metric} {percentile}")] = value
+    return values
+
+
+def compare(old_path, new_path):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{old['commit']} -> {new['commit']}")
+    old_values, new_values = flatten(old), flatten(new)
+    for key in sorted(set(old_values) & set(new_values), key=lambda key: (int(key[0]), key[1], key[2])):
+        before, after = old_values[key], new_values[key]
+        change = (after - before) / before * 100 if before else 0
+        print(f"{key[0]:>8} {key[1]:<28} {key[2]:<16} {before:10.1f} -> {after:10.1f}  ({change:+.0f}%)")
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    if arguments[:1] == ["--page"]:
+        measure_page(arguments[1], int(arguments[2]), int(arguments[3]))
+    elif arguments[:1] == ["--compare"] and len(arguments) == 3:
+        compare(arguments[1], arguments[2])
+    else:
+        def option(name, default):
+            return arguments[arguments.index(name) + 1] if name in arguments else default
+        sizes = [int(size) for size in option("--sizes", "10000,100000,1000000").split(",")]
+        run_all(sizes, int(option("--reruns", "20")), int(option("--submits", "5")))
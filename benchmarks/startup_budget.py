@@ -0,0 +1,82 @@
+# Cold start and first render time budget
+#
+# Starts a fresh Python process (so nothing is imported or cached yet) a few times and
+# measures:
+#   - cold_start: importing Streamlit, the storage layer and the default page's
+#     dependencies, and opening the storage backend
+#   - first_render: the first full run of the app for a logged-in session
+# The medians are checked against startup_budget.json; the script exits with an error
+# when a budget is exceeded. Run it from the repository folder:
+#   python benchmarks/startup_budget.py [--runs 5]
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+
+
+def measure():
+    # Runs inside the fresh process, with the working directory set to a copy of the data
+    start = time.perf_counter()
+    sys.path.insert(0, REPOSITORY)
+    import streamlit  # noqa: F401
+    import bulk_import  # noqa: F401  (used by the default page)
+    import static_assets  # noqa: F401
+    from storage import get_storage
+    get_storage()
+    cold_start = time.perf_counter() - start
+
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(os.path.join(REPOSITORY, "Pantry_Tracking_Website.py"), default_timeout=120)
+    app.session_state.authenticated = True
+    start = time.perf_counter()
+    app.run()
+    first_render = time.perf_counter() - start
+    if app.exception:
+        raise SystemExit(f"The app raised an exception: {app.exception[0].message}")
+    print(json.dumps({"cold_start": cold_start, "first_render": first_render}))
+
+
+def run_once():
+    # Work on a copy of the data files so the check never changes the real ones: the CSV
+    # files next to the app and the folders with the monthly product files and the archive
+    sys.path.insert(0, REPOSITORY)
+    from archive import ARCHIVE_DIRECTORY
+    from schemas import DATASETS
+    data_directories = {dataset["partitions"] for dataset in DATASETS.values() if "partitions" in dataset}
+    data_directories.add(ARCHIVE_DIRECTORY)
+    with tempfile.TemporaryDirectory() as directory:
+        for file_name in os.listdir(REPOSITORY):
+            path = os.path.join(REPOSITORY, file_name)
+            if file_name.endswith(".csv"):
+                shutil.copy(path, directory)
+            elif file_name in data_directories and os.path.isdir(path):
+                shutil.copytree(path, os.path.join(directory, file_name))
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--measure"], cwd=directory,
+                                capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    if "--measure" in sys.argv:
+        measure()
+        sys.exit(0)
+
+    runs = int(sys.argv[sys.argv.index("--runs") + 1]) if "--runs" in sys.argv else 5
+    with open(BUDGET_PATH, encoding="utf-8") as f:
+        budget = json.load(f)
+
+    timings = [run_once() for _ in range(runs)]
+    failed = False
+    for name, limit in budget.items():
+        median = statistics.median(timing[name] for timing in timings)
+        status = "ok" if median <= limit else "OVER BUDGET"
+        failed = failed or median > limit
+        print(f"{name}: {median:.2f}s (budget {limit:.2f}s, median of {runs}) {status}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,173 @@
+# Bulk import of paper-logged entries
+#
+# A whole CSV file of distributed products, donations or spoiled food is checked at
+# once, every problem in it is reported together, and the rows without problems are
+# saved with a single write. Used by the Bulk Import tab and from the command line:
+#   python bulk_import.py products|donated|spoiled FILE [--dry-run]
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+from form_options import (categories, count_methods, donation_providers, spoiled_contents, spoiled_destinations,
+                          spoiled_reasons, spoiled_sources)
+from catalog import get_catalog
+from instrumentation import span
+from quantities import WEIGHT_UNITS, parse_quantities
+from storage import columns_of, get_storage
+
+# Columns every file has to have for each dataset. Any other column of the dataset may
+# be included too and is saved as is
+REQUIRED_COLUMNS = {
+    "products": ["Date", "Category", "Product", "Count Method", "Quantity"],
+    "donated": ["Date", "Product Name", "Donation Weight (lbs)", "Donation Provider"],
+    "spoiled": ["Date", "Total Item Weight (lbs.)", "Source of Items", "Contents", "Destination", "Reasons"],
+}
+
+# Columns holding several choices (like the multiselects), separated by commas
+MULTI_CHOICE_COLUMNS = {
+    "spoiled": {
+        "Source of Items": spoiled_sources,
+        "Contents": spoiled_contents,
+        "Destination": spoiled_destinations,
+        "Reasons": spoiled_reasons,
+    },
+}
+
+# Dates can be written like the app saves them or like they're usually written on paper
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y"]
+
+
+def expected_columns(dataset):
+    # Required columns first, then the optional ones
+    optional = [column for column in columns_of(dataset) if column not in REQUIRED_COLUMNS[dataset]]
+    return REQUIRED_COLUMNS[dataset] + ([] if dataset == "products" else optional)
+
+
+def read_file(file):
+    # Every cell as text, so nothing is guessed before it's checked
+    data = pd.read_csv(file, dtype=str, keep_default_na=False)
+    data.columns = [str(column).strip() for column in data.columns]
+    return data.apply(lambda column: column.str.strip())
+
+
+def parse_dates(values):
+    # Returns the dates as "YYYY-MM-DD" text (missing where unreadable)
+    dates = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for date_format in DATE_FORMATS:
+        dates = dates.fillna(pd.to_datetime(values, format=date_format, errors="coerce"))
+    return dates
+
+
+def check_file(dataset, data):
+    """Check every row of an uploaded file for `dataset`.
+
+    Returns (rows, errors): the valid rows, ready to be saved with save_rows(), and a
+    table of problems with the file's line number, the column and what is wrong.
+    """
+    with span("bulk import check", dataset=dataset, rows=len(data)) as timing:
+        rows, errors = _check_file(dataset, data)
+        timing.set(valid_rows=len(rows), errors=len(errors))
+    return rows, errors
+
+
+def _check_file(dataset, data):
+    errors = []
+
+    def report(bad, column, problem):
+        # `bad` is a boolean Series over the rows; `problem` a message or a Series of them
+        for position in bad[bad].index:
+            message = problem if isinstance(problem, str) else problem[position]
+            errors.append({"Row": position + 2, "Column": column, "Value": data.at[position, column],
+                           "Problem": message})
+
+    missing = [column for column in REQUIRED_COLUMNS[dataset] if column not in data.columns]
+    if missing:
+        errors = [{"Row": 1, "Column": column, "Value": "", "Problem": "column is missing from the file"}
+                  for column in missing]
+        return pd.DataFrame(columns=expected_columns(dataset)), pd.DataFrame(errors)
+
+    data = data.reset_index(drop=True)
+    rows = pd.DataFrame(index=data.index)
+    for column in expected_columns(dataset):
+        rows[column] = data[column] if column in data.columns else ""
+
+    # Every dataset has a date, which can't be in the future
+    dates = parse_dates(data["Date"])
+    report(dates.isna(), "Date", "is not a date (use YYYY-MM-DD or MM/DD/YYYY)")
+    report(dates > pd.Timestamp(datetime.today().date()), "Date", "is in the future")
+    rows["Date"] = dates.dt.strftime("%Y-%m-%d")
+
+    for column in REQUIRED_COLUMNS[dataset]:
+        if column not in ["Date", "Quantity"] and "Weight" not in column:
+            report(data[column] == "", column, "is empty")
+
+    if dataset == "products":
+        known_category = data["Category"].isin(list(categories))
+        report(~known_category & (data["Category"] != ""), "Category",
+               "is not one of: " + ", ".join(categories))
+        report(~data["Count Method"].isin(count_methods) & (data["Count Method"] != ""), "Count Method",
+               "is not one of: " + ", ".join(count_methods))
+        quantities = parse_quantities(data["Quantity"])
+        report(quantities["Problem"] != "", "Quantity", quantities["Problem"])
+        # "2 crates" has to agree with the Count Method
+        report((quantities["Unit"] != "") & (quantities["Unit"] != data["Count Method"]), "Quantity",
+               "has a unit that doesn't match the Count Method")
+        rows["Quantity"] = quantities["Quantity"]
+
+    if dataset == "donated":
+        report(~data["Donation Provider"].isin(donation_providers) & (data["Donation Provider"] != ""),
+               "Donation Provider", "is not one of: " + ", ".join(donation_providers))
+
+    for column in REQUIRED_COLUMNS[dataset]:
+        if "Weight" in column:
+            weights = parse_quantities(data[column], WEIGHT_UNITS)
+            report(weights["Problem"] != "", column, weights["Problem"])
+            report(weights["Quantity"] == 0, column, "has to be more than 0")
+            rows[column] = weights["Quantity"]
+
+    for column, options in MULTI_CHOICE_COLUMNS.get(dataset, {}).items():
+        # One row per choice, so every choice is checked in one go
+        choices = data[column].str.split(",").explode().str.strip()
+        unknown = choices[(choices != "") & ~choices.isin(options)]
+        for position, choice in unknown.items():
+            errors.append({"Row": position + 2, "Column": column, "Value": data.at[position, column],
+                           "Problem": f"'{choice}' is not one of: " + ", ".join(options)})
+        rows[column] = choices[choices != ""].groupby(level=0).agg(", ".join).reindex(data.index, fill_value="")
+
+    errors = pd.DataFrame(errors, columns=["Row", "Column", "Value", "Problem"]).sort_values("Row", kind="stable")
+    valid_rows = rows.drop(index=errors["Row"] - 2)
+    return valid_rows.reset_index(drop=True), errors.reset_index(drop=True)
+
+
+def save_rows(storage, dataset, rows):
+    # All rows go to the storage backend in one call, so the files are written once
+    if rows.empty:
+        return 0
+    if dataset == "products":
+        storage.add_distributed_many(list(rows[REQUIRED_COLUMNS["products"]].itertuples(index=False, name=None)))
+        # New product names show up in every volunteer's pickers, like a custom product typed on a page
+        get_catalog().add_products(list(rows[["Category", "Product"]].itertuples(index=False, name=None)))
+    else:
+        storage.append_many(dataset, rows.to_dict("records"))
+    return len(rows)
+
+
+if __name__ == "__main__":
+    arguments = [argument for argument in sys.argv[1:] if argument != "--dry-run"]
+    if len(arguments) != 2 or arguments[0] not in REQUIRED_COLUMNS:
+        print("usage: python bulk_import.py products|donated|spoiled FILE [--dry-run]")
+        print("columns:")
+        for name in REQUIRED_COLUMNS:
+            print(f"  {name}: {', '.join(expected_columns(name))}")
+        sys.exit(1)
+
+    dataset, file_path = arguments
+    rows, errors = check_file(dataset, read_file(file_path))
+    for error in errors.itertuples(index=False):
+        print(f"line {error.Row}, {error.Column} '{error.Value}': {error.Problem}")
+    if "--dry-run" in sys.argv:
+        print(f"{len(rows)} valid rows, {errors['Row'].nunique()} rows with problems (nothing saved)")
+    else:
+        print(f"{save_rows(get_storage(), dataset, rows)} rows imported, {errors['Row'].nunique()} rows skipped")
+    sys.exit(1 if len(errors) else 0)
@@ -0,0 +1,142 @@
+# Product catalog shared by every session
+#
+# The built-in products from form_options.py plus every custom product volunteers have
+# entered, saved in catalog.json next to the data so custom products outlive the
+# session, show up for every other volunteer straight away and survive restarts. Each
+# category's list is kept sorted, so the product pickers use it as is, and a lowercase
+# copy of the names backs prefix search (bisect) with fuzzy matches (difflib) for typos.
+# Products already in the data (from before the catalog existed) can be added with:
+#   python catalog.py import
+import bisect
+import difflib
+import json
+import os
+import sys
+import threading
+
+from form_options import categories
+from storage import current_directory, file_lock, get_storage
+
+
+class Catalog:
+    """Products per category: the built-in ones and the custom ones saved in `path`."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._products = {}  # category -> every product name, sorted
+        self._search_keys = {}  # category -> sorted [(lowercase name, name)]
+        self._modified = None
+        self._build({})
+        self._refresh()
+
+    def _build(self, custom):
+        # Lists are replaced rather than changed, so a session reading the old list while
+        # another one adds a product never sees it half updated
+        for category, items in categories.items():
+            names = sorted(set(items) | set(custom.get(category, [])))
+            self._products[category] = names
+            self._search_keys[category] = sorted((name.lower(), name) for name in names)
+
+    def _refresh(self):
+        # Pick up products added by another process (like the bulk import command)
+        try:
+            modified = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if modified == self._modified:
+            return
+        with self._lock:
+            self._modified = modified
+            self._build(self._read())
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return {category: list(names) for category, names in saved.get("custom", {}).items() if category in categories}
+
+    def products(self, category):
+        """Every product in `category`, sorted. Don't change the list."""
+        self._refresh()
+        return self._products[category]
+
+    def is_known(self, category, product):
+        names = self.products(category)
+        position = bisect.bisect_left(names, product)
+        return position < len(names) and names[position] == product
+
+    def search(self, category, text, limit=20):
+        """Products in `category` starting with `text` (ignoring case), then close matches."""
+        self._refresh()
+        text = text.strip().lower()
+        keys = self._search_keys[category]
+        if not text:
+            return self._products[category][:limit]
+        # Everything starting with `text` sits together in the sorted keys
+        start = bisect.bisect_left(keys, (text,))
+        matches = []
+        for key, name in keys[start:]:
+            if not key.startswith(text) or len(matches) == limit:
+                break
+            matches.append(name)
+        if len(matches) < limit:
+            lowercase = [key for key, name in keys]
+            for close in difflib.get_close_matches(text, lowercase, n=limit - len(matches), cutoff=0.6):
+                name = keys[bisect.bisect_left(keys, (close,))][1]
+                if name not in matches:
+                    matches.append(name)
+        return matches
+
+    def add_products(self, entries):
+        """Add custom (category, product) pairs, returning the ones that were new."""
+        self._refresh()
+        new = [(category, product) for category, product in dict.fromkeys(entries)
+               if category in categories and product and not self.is_known(category, product)]
+        if not new:
+            return []
+        with self._lock, file_lock(self.path + ".lock"):
+            # Start from the saved file, in case another process added products meanwhile
+            custom = self._read()
+            for category, product in new:
+                if product not in custom.setdefault(category, []):
+                    custom[category].append(product)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"custom": custom}, f, indent=1)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            self._modified = os.stat(self.path).st_mtime_ns
+            self._build(custom)
+        return new
+
+    def add_product(self, category, product):
+        return bool(self.add_products([(category, product)]))
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Return the catalog shared by every session on this server."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = Catalog(os.environ.get("PANTRY_CATALOG", os.path.join(current_directory, "catalog.json")))
+        return _catalog
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["import"]:
+        products = get_storage().read("products")
+        entries = products[["Category", "Product"]].dropna().astype(str).drop_duplicates()
+        entries = entries[entries["Category"].isin(list(categories))].itertuples(index=False, name=None)
+        added = get_catalog().add_products(list(entries))
+        print(f"{len(added)} custom products added to the catalog")
+    else:
+        print("usage: python catalog.py import")
+        sys.exit(1)
@@ -0,0 +1,50 @@
+# Choices offered by the app's forms
+#
+# Kept out of the Streamlit script so the bulk import can check uploaded rows against
+# the same lists the forms use.
+
+# Define categories and their corresponding items
+categories = {
+    "Produce": ["Apples", "Bananas", "Oranges", "Persimmons",
+                "Tomatoes", "Potatoes", "Eggplants", "Onions",
+                "Zucchinis", "Carrots", "Beets", "Turnips", "Lettuce"],
+    "Meat": ["Chicken", "Beef", "Eggs", "Fish (General)"],
+    "Dairy": ["Milk", "Cheese", "Yogurt"],
+    "Canned/Jarred Foods": ["Tomato Sauce", "Canned Beans", "Jam"],
+    "Dry/Baking Goods": ["Flour", "Sugar", "Pasta", "Rice", "Baking Soda"],
+    "Personal Care": ["Condoms", "Pads", "Tampons", "Menstrual Cups",
+                      "Floss", "Plan B", "Sunscreen", "Lotion"]
+}
+
+# Sort items in each category
+for category, items in categories.items():
+    categories[category] = sorted(items)
+
+count_methods = ["Individual", "Crates"]
+
+# Track Donated Products
+donation_providers = ["Aggie Compass", "Student Farm", "FRN (Food Recovery Network)", "COHO", "MU Market", "St Martins",
+                      "Davis Lutheran Church", "EOP", "Yolo Farm 2 Fork", "Student Organization", "Other"]
+donation_contents = ["Fruit", "Vegetables", "Bread", "Canned/Packaged Foods", "Dairy", "Drinks (non-dairy)", "Toiletries",
+                     "Menstrual Products", "Other"]
+
+# Track Spoiled Foods
+spoiled_sources = [
+    "YFB (Yolo Food Bank)", "Daylight Foods", "Student Farm", "Aggie Compass", "Food Recovery Network (FRN)",
+    "EOP", "St Martins", "Davis Lutheran Church", "Yolo Farm 2 Fork", "Student Organization (Please specify in 'Other')",
+    "I don't know", "Other"
+]
+spoiled_contents = [
+    "Fruit", "Vegetable - Greens (Lettuce/Broccoli etc.)", "Vegetable - Gourds (Squash/Pumpkins etc.)",
+    "Vegetable - Roots (Beets/Carrots/Onions etc.)", "Potatoes", "Dairy", "Bread", "Canned Foods",
+    "Plastic-packaged Foods", "Drinks (non-dairy)", "Other"
+]
+spoiled_destinations = ["Freedge", "Compost", "Landfill", "Other"]
+spoiled_reasons = [
+    "(Produce) A Little Ugly Looking BUT is Still Suitable to Consume",
+    "Past Food Safety Recommendation Date BUT is Still Suitable to Consume",
+    "Damage to Packaging (e.g. dented cans) BUT is Still Suitable to Consume",
+    "Damage to Contents (e.g. fell on floor) BUT is Still Suitable to Consume",
+    "Other"
+]
+
@@ -0,0 +1,230 @@
+# HTTP API for kiosks and barcode scanners
+#
+# A small JSON API next to the Streamlit app, so a scanner station can record entries
+# without going through a form (and a whole script rerun) for each one. Every request
+# is checked with the bulk import's checks (bulk_import.py) and saved through the same
+# storage backend as the pages. Requests that come in together are saved together:
+# a batcher thread collects them for a moment and writes each dataset once.
+#
+# POST a JSON object or a list of them, with the same columns as the bulk import:
+#   /distributed    Category, Product, Count Method, Quantity (like Products Distributed)
+#   /products_left  Category, Product, Count Method, Quantity (like Products Left)
+#   /donated        Product Name, Donation Weight (lbs), Donation Provider, ...
+#   /spoiled        Total Item Weight (lbs.), Source of Items, Contents, Destination, Reasons, ...
+# "Date" is optional and defaults to today. Multi-choice columns can be lists. Send the
+# app's password as "Authorization: Bearer <password>". The answer is
+#   200 {"saved": <rows>} once everything is saved, or
+#   422 {"errors": [{"Row": ..., "Column": ..., "Value": ..., "Problem": ...}]} with nothing saved.
+# GET /health answers {"ok": true}.
+#
+# Runs inside the Streamlit server when PANTRY_API_PORT is set, or on its own with:
+#   python ingest_api.py [PORT]
+# On its own, the app notices the API's entries by the data files' signatures: the walk
+# in menu and the analytics totals read them in the next time they're shown.
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from bulk_import import REQUIRED_COLUMNS, check_file, save_rows
+from catalog import get_catalog
+from instrumentation import span
+from login import PASSWORD
+from storage import get_storage
+
+# URL path -> the dataset its rows are checked against
+ENDPOINTS = {
+    "/distributed": "products",
+    "/products_left": "products",
+    "/donated": "donated",
+    "/spoiled": "spoiled",
+}
+
+MAX_BODY_BYTES = 1024 * 1024
+
+
+def records_to_frame(records, dataset):
+    # The bulk import checks text cells, like the ones read from a file. A column left out
+    # of every record is added empty, so it's reported for each record that needs it
+    def text(value):
+        if value is None:
+            return ""
+        if isinstance(value, list):
+            return ", ".join(str(item).strip() for item in value)
+        return str(value).strip()
+
+    data = pd.DataFrame([{column: text(value) for column, value in record.items()} for record in records], dtype=str)
+    data = data.reindex(columns=list(dict.fromkeys(REQUIRED_COLUMNS[dataset] + list(data.columns)))).fillna("")
+    data["Date"] = data["Date"].replace("", datetime.today().strftime("%Y-%m-%d"))
+    return data
+
+
+class IngestBatcher:
+    """Checks and saves the records of many requests together.
+
+    Each request hands its records to submit() and waits. The batcher thread waits up
+    to `max_wait` seconds for more requests (or until `max_rows` records), then checks
+    each endpoint's records in one go, saves the rows of every request without problems
+    with one storage call and answers every request in the batch.
+    """
+
+    def __init__(self, storage, max_wait=0.05, max_rows=1000):
+        self.storage = storage
+        self.max_wait = max_wait
+        self.max_rows = max_rows
+        self._queue = queue.Queue()
+        threading.Thread(target=self._run, name="pantry-ingest", daemon=True).start()
+
+    def submit(self, endpoint, records):
+        """Returns (rows saved, errors), with nothing saved if there are errors."""
+        future = Future()
+        self._queue.put((endpoint, records, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while sum(len(records) for _, records, _ in batch) < self.max_rows:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            with span("ingest batch", requests=len(batch), rows=sum(len(records) for _, records, _ in batch)):
+                for endpoint in dict.fromkeys(endpoint for endpoint, _, _ in batch):
+                    requests = [(records, future) for name, records, future in batch if name == endpoint]
+                    try:
+                        self._check_and_save(endpoint, requests)
+                    except Exception as e:
+                        for records, future in requests:
+                            if not future.done():
+                                future.set_exception(e)
+
+    def _check_and_save(self, endpoint, requests):
+        # Which request each record came from
+        owners = [number for number, (records, future) in enumerate(requests) for record in records]
+        data = records_to_frame([record for records, future in requests for record in records], ENDPOINTS[endpoint])
+        rows, errors = check_file(ENDPOINTS[endpoint], data)
+        if not errors.empty:
+            # Requests with a problem get their own errors (rows numbered from 1 in the
+            # request) and nothing of theirs is saved; the others are checked again without them
+            starts = {}
+            for position, number in enumerate(owners):
+                starts.setdefault(number, position)
+            errors["Request"] = [owners[row - 2] for row in errors["Row"]]
+            for number, request_errors in errors.groupby("Request"):
+                request_errors = request_errors.assign(Row=request_errors["Row"] - 1 - starts[number])
+                requests[number][1].set_result((0, json.loads(request_errors.drop(columns="Request").to_json(orient="records"))))
+            keep = [owner not in set(errors["Request"]) for owner in owners]
+            rows, errors = check_file(ENDPOINTS[endpoint], data[keep])
+        self._save(endpoint, rows)
+        for records, future in requests:
+            if not future.done():
+                future.set_result((len(records), []))
+
+    def _save(self, endpoint, rows):
+        if rows.empty:
+            return
+        if endpoint == "/products_left":
+            # End-of-day counts replace a value rather than add one, so they go in one by one
+            for date, category, product, count_method, quantity in rows[REQUIRED_COLUMNS["products"]].itertuples(
+                    index=False, name=None):
+                self.storage.set_product_left(date, category, product, count_method, quantity)
+            # New product names show up in the forms, like rows saved by save_rows
+            get_catalog().add_products(list(rows[["Category", "Product"]].itertuples(index=False, name=None)))
+        else:
+            save_rows(self.storage, ENDPOINTS[endpoint], rows)
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    batcher = None  # Set by make_server
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._answer(200, {"ok": True})
+        else:
+            self._answer(404, {"error": f"No such path: {self.path}"})
+
+    def do_POST(self):
+        if self.headers.get("Authorization") != f"Bearer {PASSWORD}":
+            self._answer(401, {"error": "Wrong or missing password"})
+            return
+        if self.path not in ENDPOINTS:
+            self._answer(404, {"error": f"No such path: {self.path}, use one of: {', '.join(ENDPOINTS)}"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._answer(413, {"error": f"Send at most {MAX_BODY_BYTES} bytes per request"})
+            return
+        try:
+            records = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            self._answer(400, {"error": "The body isn't valid JSON"})
+            return
+        records = [records] if isinstance(records, dict) else records
+        if not isinstance(records, list) or not records or not all(isinstance(record, dict) for record in records):
+            self._answer(400, {"error": "Send a JSON object or a list of them"})
+            return
+
+        try:
+            saved, errors = self.batcher.submit(self.path, records)
+        except Exception as e:
+            self._answer(500, {"error": f"Couldn't save: {e}"})
+            return
+        if errors:
+            self._answer(422, {"errors": errors})
+        else:
+            self._answer(200, {"saved": saved})
+
+    def _answer(self, status, body):
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass  # Timings go to the trace log (instrumentation.py) instead
+
+
+class IngestServer(ThreadingHTTPServer):
+    # Room for a burst of scanners connecting at once (the default turns away all but 5)
+    request_queue_size = 128
+
+
+def make_server(port, host="127.0.0.1", storage=None):
+    handler = type("Handler", (IngestHandler,), {"batcher": IngestBatcher(storage or get_storage())})
+    return IngestServer((host, port), handler)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_api_from_env():
+    """Serve the API from this process on PANTRY_API_PORT (if set), once per server."""
+    global _server
+    port = os.environ.get("PANTRY_API_PORT")
+    with _server_lock:
+        if _server is None and port:
+            _server = make_server(int(port), os.environ.get("PANTRY_API_HOST", "127.0.0.1"))
+            threading.Thread(target=_server.serve_forever, name="pantry-api", daemon=True).start()
+    return _server
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 or not all(argument.isdigit() for argument in sys.argv[1:]):
+        print("usage: python ingest_api.py [PORT]")
+        sys.exit(1)
+    port = int(sys.argv[1]) if sys.argv[1:] else int(os.environ.get("PANTRY_API_PORT", 8502))
+    server = make_server(port, os.environ.get("PANTRY_API_HOST", "127.0.0.1"))
+    print(f"Listening on http://{server.server_address[0]}:{port}")
+    server.serve_forever()
@@ -0,0 +1,104 @@
+# Timing of the app's slow spots
+#
+# Turned on with PANTRY_TRACE=1. Every file read and write, aggregation and page render
+# is then timed and written as one JSON line (operation, milliseconds, rows, bytes, ...)
+# to a rotating log, PANTRY_TRACE_LOG (default pantry_trace.jsonl, up to 4 files of
+# 5 MB). The Diagnostics page summarises it. When tracing is off span() hands back a
+# shared object that does nothing, so the timed code pays for one function call.
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+ENABLED = os.environ.get("PANTRY_TRACE", "") not in ("", "0")
+LOG_PATH = os.environ.get("PANTRY_TRACE_LOG", os.path.join(os.getcwd(), "pantry_trace.jsonl"))
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def _get_logger():
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            _logger = logging.getLogger("pantry.trace")
+            _logger.propagate = False
+            _logger.setLevel(logging.INFO)
+            handler = logging.handlers.RotatingFileHandler(LOG_PATH, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT,
+                                                           encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _logger.addHandler(handler)
+        return _logger
+
+
+class _NoSpan:
+    # What span() returns when tracing is off
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    def __init__(self, operation, fields):
+        self.operation = operation
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def set(self, **fields):
+        # Add details only known once the work is done (rows read, bytes written, ...)
+        self.fields.update(fields)
+
+    def __exit__(self, exc_type, exc, traceback):
+        record = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "operation": self.operation,
+            "ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "thread": threading.current_thread().name,
+        }
+        record.update(self.fields)
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        _get_logger().info(json.dumps(record, default=str))
+        return False
+
+
+def span(operation, **fields):
+    """Time a block of code: `with span("read csv", file=name) as s: ...; s.set(rows=n)`."""
+    if not ENABLED:
+        return _NO_SPAN
+    return _Span(operation, fields)
+
+
+def read_log():
+    # Every span still in the log files, oldest first
+    paths = [f"{LOG_PATH}.{number}" for number in range(BACKUP_COUNT, 0, -1)] + [LOG_PATH]
+    records = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass  # A line still being written by another session
+    return pd.DataFrame(records, columns=None if records else ["time", "operation", "ms", "thread"])
@@ -0,0 +1,31 @@
+# Password gate shared by the pages
+#
+# Logging in on any page logs the whole browser session in, since every page reads the
+# same st.session_state.
+import streamlit as st
+
+PASSWORD = "pantry"
+
+
+def require_login(form_key):
+    """Show the login form until this session has logged in. Returns True once it has."""
+    if "authenticated" not in st.session_state:
+        st.session_state.authenticated = False
+
+    # Show login if not authenticated
+    if st.session_state.authenticated == False:
+        st.title("🔒 Restricted Access")
+
+        # Login button
+        with st.form(form_key):
+            password_input = st.text_input("Enter Password:")
+            submit_button = st.form_submit_button("Login")  # Pressing Enter submits the form
+
+            if submit_button:
+                if password_input == PASSWORD:
+                    st.session_state.authenticated = True
+                    st.rerun()
+                else:
+                    st.error("Incorrect password. Try again.")
+
+    return st.session_state.authenticated == True
@@ -0,0 +1,319 @@
+# Public intake for the Plan B questionnaire
+#
+# The questionnaire is the one page without a login, so it can be put on a QR code and
+# filled in by many people at the same moment. Instead of every submit waiting its turn
+# for the data lock and planB_data.csv, responses are appended to one of SHARDS small
+# files (planB_intake/shard-<n>.jsonl, a JSON list of answers per line, so an answer with
+# line breaks still takes one line), each server thread taking the next one in turn, so
+# submits at the same moment hardly ever wait for each other. Every MERGE_SECONDS
+# (and before staff look at the data) the shards are merged into planB_data.csv with
+# one append, sorted by date.
+#
+# Counts per age band, gender identity, financial challenge and barrier are kept in
+# planB_stats.json and updated with each merge, so staff can see them without loading
+# the responses. They're rebuilt from planB_data.csv if it was changed some other way.
+#
+# Merging is safe to interrupt: shards are renamed to shard-<n>.<unique id>.claimed, their
+# rows are saved to .merge-<offset>.csv (the byte offset in planB_data.csv they go to)
+# and only then are the claimed shards removed and the rows appended. Claimed shards a
+# failed merge left behind are taken into the next one, and a merge cut off after its
+# rows were saved is finished by the next one, without adding any row twice. A line that
+# can't be read (cut off by a crash) is set aside in planB_intake/rejected.jsonl instead
+# of holding up the responses after it.
+import csv
+import io
+import itertools
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+from instrumentation import span
+from schemas import check_records, columns_of, read_csv
+from storage import CsvStorage, end_last_line, file_lock, get_storage, write_csv_atomic
+
+MERGE_SECONDS = 30
+SHARDS = 16
+
+# (lowest age, label), each band goes up to the next one's lowest age
+AGE_BANDS = [(0, "Under 18"), (18, "18-20"), (21, "21-24"), (25, "25-29"), (30, "30-39"), (40, "40 and over")]
+
+# What's counted for the staff view. Barriers are a multiselect, so a response counts
+# towards each barrier it names
+STATS_COLUMNS = ["Age Band", "Gender Identity", "Financial Background", "Barrier From Obtaining Plan B"]
+SPLIT_COLUMNS = ["Barrier From Obtaining Plan B"]
+
+
+def age_bands(ages):
+    ages = pd.to_numeric(ages, errors="coerce")
+    bands = pd.cut(ages, [low for low, label in AGE_BANDS] + [float("inf")], right=False,
+                   labels=[label for low, label in AGE_BANDS])
+    return bands.astype(object).where(ages.notna(), "Unknown")
+
+
+def count_responses(data):
+    """{what: {answer: number of responses}} for everything in STATS_COLUMNS."""
+    counts = {}
+    for column in STATS_COLUMNS:
+        values = age_bands(data["Age"]) if column == "Age Band" else data[column].astype(object)
+        values = values.where(values.notna(), "").astype(str)
+        if column in SPLIT_COLUMNS:
+            values = values.str.split(", ").explode()
+        values = values[values != ""]
+        counts[column] = {value: int(count) for value, count in values.value_counts().items()}
+    return counts
+
+
+def add_counts(counts, more):
+    for column, values in more.items():
+        totals = counts.setdefault(column, {})
+        for value, count in values.items():
+            totals[value] = totals.get(value, 0) + count
+    return counts
+
+
+class PlanBIntake:
+    """Takes questionnaire responses into shard files and merges them into planB."""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.shard_directory = os.path.join(storage.directory, "planB_intake")
+        self.stats_path = os.path.join(storage.directory, "planB_stats.json")
+        self.rejected_path = os.path.join(self.shard_directory, "rejected.jsonl")
+        self._stats_lock = threading.Lock()
+        self._shard_numbers = itertools.count()
+        self._thread_shard = threading.local()
+        os.makedirs(self.shard_directory, exist_ok=True)
+        # A merge cut off by a crash or an error is finished before anything else is written
+        leftovers = [file for file in os.listdir(self.shard_directory)
+                     if file.startswith(".merge-") or file.endswith(".claimed")]
+        if leftovers:
+            try:
+                storage.apply_change(self._merge)
+            except Exception as e:
+                print(f"Plan B merge failed: {e}", flush=True)  # Tried again on every round
+        # Shards left from before a restart are merged on the first round
+        self._stop = threading.Event()
+        threading.Thread(target=self._merge_regularly, name="pantry-planb-merge", daemon=True).start()
+
+    def submit(self, record):
+        """Save one response to this thread's shard."""
+        check_records("planB", [record])
+        answers = [record.get(column, "") for column in columns_of("planB")]
+        line = json.dumps(answers, default=lambda value: value.item() if hasattr(value, "item") else str(value))
+        if not hasattr(self._thread_shard, "number"):
+            self._thread_shard.number = next(self._shard_numbers) % SHARDS
+        path = os.path.join(self.shard_directory, f"shard-{self._thread_shard.number}.jsonl")
+        # The shard is opened while holding its lock, so a merge can't claim it halfway
+        with span("plan b submit"), file_lock(path + ".lock"), open(path, "ab+") as f:
+            end_last_line(f)  # After a line cut off by a crash
+            f.write(line.encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def merge(self):
+        """Move every shard's responses into planB_data.csv, returning how many were moved."""
+        if not any(file.startswith("shard-") and file.endswith((".jsonl", ".claimed"))
+                   for file in os.listdir(self.shard_directory)):
+            return 0
+        return self.storage.apply_change(self._merge)
+
+    def rejected(self):
+        # How many lines were set aside because they couldn't be read
+        try:
+            with open(self.rejected_path, "rb") as f:
+                return sum(1 for line in f if line.strip())
+        except FileNotFoundError:
+            return 0
+
+    def stats(self):
+        """Return (number of responses, {what: {answer: count}}). The raw responses are
+        only read if planB_data.csv was changed outside of a merge."""
+        self.merge()
+        with self._stats_lock:
+            saved = self._read_stats()
+            signature = self.storage.signature("planB")
+            if saved is None or saved["signature"] != signature:
+                data = self.storage.read("planB")
+                with span("plan b stats rebuild", rows=len(data)):
+                    saved = {"signature": signature, "responses": len(data), "counts": count_responses(data)}
+                self._write_stats(saved)
+            return saved["responses"], saved["counts"]
+
+    def _merge_regularly(self):
+        while not self._stop.wait(MERGE_SECONDS):
+            try:
+                self.merge()
+            except Exception as e:
+                print(f"Plan B merge failed: {e}", flush=True)
+
+    # The methods below only run on the writer thread
+
+    def _merge(self):
+        with span("plan b merge") as timing:
+            self._finish_merges()
+            # Claim every shard: a submit from now on starts a new one. Each claim gets a
+            # name of its own, so one left by a failed merge is never overwritten, it's
+            # merged together with the new ones below
+            for file in os.listdir(self.shard_directory):
+                if file.startswith("shard-") and file.endswith(".jsonl"):
+                    path = os.path.join(self.shard_directory, file)
+                    with file_lock(path + ".lock"):
+                        os.rename(path, f"{path[:-len('.jsonl')]}.{uuid.uuid4().hex}.claimed")
+            claimed = [os.path.join(self.shard_directory, file)
+                       for file in sorted(os.listdir(self.shard_directory)) if file.endswith(".claimed")]
+            lines = [line for path in claimed for line in self._read_shard(path)]
+            rows = self._read_responses(lines)
+            if rows.empty:
+                self._remove(claimed)
+                return 0
+            rows = rows.sort_values("Date", kind="stable")
+
+            offset = self._start_of_new_rows()
+            merge_path = os.path.join(self.shard_directory, f".merge-{offset}.csv")
+            write_csv_atomic(merge_path, rows, header=False)
+            self._remove(claimed)
+            self._finish_merges()
+            timing.set(rows=len(rows))
+            return len(rows)
+
+    def _finish_merges(self):
+        # Append the rows of every saved merge that isn't in planB_data.csv yet
+        for file in sorted(os.listdir(self.shard_directory)):
+            if not (file.startswith(".merge-") and file.endswith(".csv")):
+                continue
+            merge_path = os.path.join(self.shard_directory, file)
+            with open(merge_path, "rb") as f:
+                block = f.read()
+            # The shards were saved in this merge, the ones still claimed are already in it
+            self._remove([os.path.join(self.shard_directory, file)
+                          for file in os.listdir(self.shard_directory) if file.endswith(".claimed")])
+            stats_current = self._stats_current()
+            if self._write_block(int(file[len(".merge-"):-len(".csv")]), block) and stats_current:
+                header = ",".join(columns_of("planB")).encode("utf-8") + b"\n"
+                self._add_to_stats(read_csv(io.BytesIO(header + block), "planB", compact=False))
+            os.remove(merge_path)
+
+    def _read_shard(self, path):
+        with open(path, "rb") as f:
+            return [line for line in f.read().splitlines() if line.strip()]
+
+    def _read_responses(self, lines):
+        # The responses in `lines` as rows of planB, with any line that can't be read set
+        # aside in rejected.jsonl
+        answers = []
+        rejected = []
+        for line in lines:
+            try:
+                values = json.loads(line)
+                if not (isinstance(values, list) and len(values) == len(columns_of("planB"))):
+                    raise ValueError(f"expected a list of {len(columns_of('planB'))} answers")
+                answers.append(values)
+            except ValueError as e:
+                rejected.append({"line": line.decode("utf-8", errors="replace"), "error": str(e)})
+        if rejected:
+            self._reject(rejected)
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows([columns_of("planB")] + answers)
+        return read_csv(io.BytesIO(buffer.getvalue().encode("utf-8")), "planB", compact=False)
+
+    def _reject(self, rejected):
+        # Saved before the claimed shards are removed, so nothing is lost
+        time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with open(self.rejected_path, "ab+") as f:
+            end_last_line(f)
+            for item in rejected:
+                print(f"Plan B response set aside in {os.path.basename(self.rejected_path)}: {item}", flush=True)
+                f.write(json.dumps(dict(item, time=time)).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _remove(self, paths):
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _start_of_new_rows(self):
+        # Byte offset where merged rows go: the end of planB_data.csv, after making sure
+        # it has its header and ends with a full line
+        path = self.storage.path("planB")
+        with open(path, "ab+") as f:
+            f.seek(0)
+            header = f.readline().decode("utf-8-sig").strip("\r\n")
+            if not header:
+                f.write(",".join(columns_of("planB")).encode("utf-8") + b"\n")
+            elif next(csv.reader([header])) != columns_of("planB"):
+                raise ValueError(f"{os.path.basename(path)} has columns {header}, expected {columns_of('planB')}")
+            else:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+            return f.seek(0, os.SEEK_END)
+
+    def _write_block(self, offset, block):
+        # Write `block` at `offset` of planB_data.csv, returning False if it's there already.
+        # Anything after `offset` that isn't the whole block is a cut off earlier try
+        with open(self.storage.path("planB"), "r+b") as f:
+            f.seek(offset)
+            if f.read(len(block)) == block:
+                return False
+            f.truncate(offset)
+            f.seek(offset)
+            f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+
+    def _stats_current(self):
+        saved = self._read_stats()
+        return saved is not None and saved["signature"] == self.storage.signature("planB")
+
+    def _add_to_stats(self, rows):
+        with self._stats_lock:
+            saved = self._read_stats()
+            saved["responses"] += len(rows)
+            saved["counts"] = add_counts(saved["counts"], count_responses(rows))
+            saved["signature"] = self.storage.signature("planB")
+            self._write_stats(saved)
+
+    def _read_stats(self):
+        try:
+            with open(self.stats_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_stats(self, saved):
+        temp_path = self.stats_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(saved, f)
+        os.replace(temp_path, self.stats_path)
+
+
+_intake = None
+_intake_lock = threading.Lock()
+
+
+def get_planb_intake():
+    """Return the intake shared by every session on this server, or None with the SQLite
+    backend (the database takes concurrent inserts by itself)."""
+    global _intake
+    with _intake_lock:
+        storage = get_storage()
+        if _intake is None and isinstance(storage, CsvStorage):
+            _intake = PlanBIntake(storage)
+        return _intake
+
+
+def response_stats():
+    """(number of responses, {what: {answer: count}}) for whichever backend is in use."""
+    intake = get_planb_intake()
+    if intake is not None:
+        return intake.stats()
+    data = get_storage().read("planB")
+    return len(data), count_responses(data)
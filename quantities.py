@@ -0,0 +1,120 @@
+# Reading quantities typed by volunteers
+#
+# One parser for every place a quantity is typed: the form inputs, the bulk import and
+# fixing up the saved history. A whole column is parsed at once: plain numbers with
+# pd.to_numeric and everything else with one regular expression through pandas string
+# methods, each different value only once. Accepted:
+#   whole numbers and decimals   2, 2.5, .75
+#   fractions                    3/4
+#   mixed numbers                1 1/2, 1-1/2
+#   a unit after the number      2 crates, 3/4 crate, 5 items, 1 1/2 lbs
+# Re-read the saved product history with this parser (for values edited by hand) with:
+#   python quantities.py normalize [--dry-run]
+import sys
+
+import pandas as pd
+
+# Unit written after a number -> what it means. Counts map to the count methods
+COUNT_UNITS = {
+    "crate": "Crates", "crates": "Crates",
+    "item": "Individual", "items": "Individual", "each": "Individual", "ea": "Individual",
+    "pc": "Individual", "pcs": "Individual", "piece": "Individual", "pieces": "Individual",
+    "individual": "Individual",
+}
+WEIGHT_UNITS = {"lb": "lbs", "lbs": "lbs", "pound": "lbs", "pounds": "lbs"}
+
+QUANTITY_PATTERN = (
+    r"^(?P<sign>[+-]?)\s*"
+    r"(?:(?:(?P<whole>\d+)[\s-]+)?(?P<numerator>\d+)\s*/\s*(?P<denominator>\d+)"  # 3/4, 1 1/2
+    r"|(?P<decimal>\d+(?:\.\d*)?|\.\d+))"  # 2, 2.5, .75
+    r"\s*(?P<unit>[A-Za-z][A-Za-z.]*)?$"
+)
+
+# Columns of the product history holding quantities
+PRODUCT_QUANTITY_COLUMNS = ["Product Distributed", "Product Left", "Total Product Distributed"]
+
+
+def parse_quantities(values, units=COUNT_UNITS):
+    """Parse a Series of typed quantities.
+
+    Returns a DataFrame with the same index and the columns Quantity (float, NaN where
+    the value couldn't be read), Unit (what the unit means according to `units`, "" if
+    none was written) and Problem (a message, "" when the value is fine).
+    """
+    # Typed quantities repeat a lot ("1", "1/2", "2 crates", ...), so each different
+    # value is parsed once and the results are spread back over the column
+    codes, distinct = pd.factorize(values.astype(str).str.strip().where(values.notna(), ""))
+    parsed = _parse_distinct(pd.Series(distinct, dtype=object), units)
+    parsed = parsed.iloc[codes]
+    parsed.index = values.index
+    return parsed
+
+
+def _parse_distinct(text, units):
+    # Plain numbers are converted in one go, only the rest goes through the pattern
+    numbers = pd.to_numeric(text, errors="coerce").astype(float)
+    numbers = numbers.where(numbers.abs() != float("inf"))
+    parts = text[numbers.isna()].str.extract(QUANTITY_PATTERN).reindex(text.index)
+    whole = pd.to_numeric(parts["whole"]).astype(float).fillna(0)
+    numerator = pd.to_numeric(parts["numerator"]).astype(float)
+    denominator = pd.to_numeric(parts["denominator"]).astype(float)
+    numbers = numbers.fillna(pd.to_numeric(parts["decimal"]).astype(float))
+    numbers = numbers.fillna(whole + numerator / denominator.where(denominator != 0))
+    numbers = numbers.where(parts["sign"] != "-", -numbers)
+
+    unit = parts["unit"].str.lower().str.rstrip(".")
+    meaning = unit.map(units)
+
+    problems = pd.Series("", index=text.index, dtype=object)
+    problems[numbers.isna()] = "is not a number or fraction (e.g. 2.5, 3/4 or 1 1/2)"
+    problems[text == ""] = "is empty"
+    problems[denominator == 0] = "is a fraction divided by zero"
+    problems[numbers < 0] = "can't be negative"
+    problems[unit.notna() & meaning.isna()] = "has an unknown unit (use one of: " + ", ".join(units) + ")"
+
+    return pd.DataFrame({"Quantity": numbers.where(problems == ""), "Unit": meaning.fillna("").astype(object),
+                         "Problem": problems})
+
+
+def parse_quantity(value, units=COUNT_UNITS):
+    """Parse one typed quantity, returning (quantity, unit, problem) like parse_quantities."""
+    text = "" if value is None else str(value).strip()
+    row = _parse_distinct(pd.Series([text], dtype=object), units).iloc[0]
+    return row["Quantity"], row["Unit"], row["Problem"]
+
+
+def normalize_products(storage, save=True):
+    # Re-read every quantity in the product history, returning the values that couldn't
+    # be read. The history is only rewritten if something changed
+    data = storage.read("products")
+    problems = []
+    changed = False
+    for column in PRODUCT_QUANTITY_COLUMNS:
+        parsed = parse_quantities(data[column].fillna(0))
+        bad = parsed["Problem"] != ""
+        problems.append(pd.DataFrame({"Date": data.loc[bad, "Date"], "Product": data.loc[bad, "Product"],
+                                      "Column": column, "Value": data.loc[bad, column],
+                                      "Problem": parsed.loc[bad, "Problem"]}))
+        # A column read as numbers is already fine; one kept as text (see schemas.py) is
+        # written back with every value that could be read turned into a number
+        if not pd.api.types.is_numeric_dtype(data[column]):
+            data[column] = parsed["Quantity"].where(~bad, data[column])
+            changed = True
+    if save and changed:
+        storage.replace("products", data)
+    return pd.concat(problems)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["normalize"]:
+        from storage import get_storage
+
+        dry_run = "--dry-run" in sys.argv
+        problems = normalize_products(get_storage(), save=not dry_run)
+        for problem in problems.itertuples(index=False):
+            print(f"{problem.Date} {problem.Product} {problem.Column} '{problem.Value}': {problem.Problem}")
+        print(f"{len(problems)} values couldn't be read and were left as they were"
+              + (" (nothing saved)" if dry_run else ""))
+    else:
+        print("usage: python quantities.py normalize [--dry-run]")
+        sys.exit(1)
@@ -0,0 +1,319 @@
+# Running totals for the analytics tab
+#
+# Daily, weekly and monthly sums are kept for a few fixed questions (what was
+# distributed, donated, spoiled and handed out) and updated by the storage layer on
+# every write, so the analytics tab never has to go through the raw history.
+import itertools
+import json
+import math
+import os
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+
+from instrumentation import span
+from schemas import exact_values
+
+
+# What gets summed, grouped by what. "split" columns hold several choices joined with
+# ", " (multiselects); a row counts towards each of its choices
+METRICS = {
+    "Products Distributed": {
+        "dataset": "products",
+        "groups": ["Category", "Product", "Count Method"],
+        "value": "Total Product Distributed",
+    },
+    "Donation Weight (lbs) by Provider": {
+        "dataset": "donated",
+        "groups": ["Donation Provider"],
+        "value": "Donation Weight (lbs)",
+    },
+    "Spoiled Weight (lbs.) by Destination": {
+        "dataset": "spoiled",
+        "groups": ["Destination"],
+        "value": "Total Item Weight (lbs.)",
+        "split": "Destination",
+    },
+    "Spoiled Weight (lbs.) by Reason": {
+        "dataset": "spoiled",
+        "groups": ["Reasons"],
+        "value": "Total Item Weight (lbs.)",
+        "split": "Reasons",
+    },
+    "Menstrual Products by Brand and Type": {
+        "dataset": "menstrual",
+        "groups": ["Brand", "Product Type"],
+        "value": "Quantity",
+    },
+}
+
+GRANULARITIES = ["Daily", "Weekly", "Monthly"]
+
+# Datasets that feed at least one metric
+SOURCES = {spec["dataset"] for spec in METRICS.values()}
+
+
+def period_of(day, granularity):
+    # "2025-02-14" -> "2025-02-14" (Daily), "2025-02-10" (Weekly, starting Monday), "2025-02" (Monthly)
+    if granularity == "Daily":
+        return day
+    if granularity == "Weekly":
+        as_date = date.fromisoformat(day)
+        return (as_date - timedelta(days=as_date.weekday())).isoformat()
+    return day[:7]
+
+
+def daily_totals(data, metric):
+    """Sum a dataset's rows into {day: {group: value}} for one metric."""
+    spec = METRICS[metric]
+    if data.empty:
+        return {}
+    frame = pd.DataFrame({"Day": data["Date"].astype(str).str[:10]})
+    for column in spec["groups"]:
+        frame[column] = data[column].astype(str).where(data[column].notna(), "")
+    frame["Value"] = exact_values(data[spec["value"]]).fillna(0)
+    if "split" in spec:
+        frame[spec["split"]] = frame[spec["split"]].str.split(", ")
+        frame = frame.explode(spec["split"])
+        frame = frame[frame[spec["split"]] != ""]
+    totals = {}
+    for key, value in frame.groupby(["Day"] + spec["groups"])["Value"].sum().items():
+        totals.setdefault(key[0], {})[tuple(key[1:])] = float(value)
+    return totals
+
+
+def record_totals(records, metric):
+    """Same as daily_totals, for a list of record dicts.
+
+    Works on the dicts directly: building a DataFrame costs more than the sums when
+    only a record or two come in with each submit.
+    """
+    spec = METRICS[metric]
+    totals = {}
+    for record in records:
+        choices = []
+        for column in spec["groups"]:
+            text = record.get(column)
+            text = "" if text is None or (isinstance(text, float) and math.isnan(text)) else str(text)
+            choices.append([choice for choice in text.split(", ") if choice != ""] if column == spec.get("split") else [text])
+        try:
+            value = float(record.get(spec["value"]))
+        except (TypeError, ValueError):
+            value = 0.0
+        if math.isnan(value):
+            value = 0.0
+        day_totals = totals.setdefault(str(record["Date"])[:10], {})
+        for group in itertools.product(*choices):
+            day_totals[group] = day_totals.get(group, 0) + value
+    return totals
+
+
+class Rollups:
+    """Daily, weekly and monthly totals for every metric in METRICS.
+
+    Built from the raw data the first time they are needed, then kept up to date by the
+    storage backend: appended records are added in, and a change to a day of product
+    data re-sums just that day. With `state_path` the totals are saved to disk (a couple
+    of seconds after the last change) together with a signature of the data files they
+    cover, and rebuilt on start only for datasets whose files have changed since.
+
+    Files changed by another process (the bulk import command, a second app) don't
+    match the signature the totals were summed from, so that dataset is summed again
+    when the totals are next shown or changed. `run_exclusive` runs a function while no
+    write is in progress (the CSV backend's writer thread), so the totals are never
+    summed from files that are halfway through a change of this process.
+    """
+
+    def __init__(self, storage, state_path=None, run_exclusive=None):
+        self._storage = storage
+        self._state_path = state_path
+        self._run_exclusive = run_exclusive or (lambda change, *args: change(*args))
+        self._totals = None  # metric -> granularity -> period -> {group: value}
+        self._signatures = {}  # dataset -> signature of the files the totals were summed from
+        self._stale = set()  # Datasets another process changed, summed again on the next change
+        self._lock = threading.RLock()
+        self._save_timer = None
+
+    def table(self, metric, granularity, start=None, end=None):
+        # The totals as a DataFrame: Period, the metric's group columns and Value
+        spec = METRICS[metric]
+        self._run_exclusive(self._refresh)
+        with span("rollups table", metric=metric, granularity=granularity) as timing:
+            with self._lock:
+                periods = self._totals[metric][granularity]
+                rows = [[period, *group, value]
+                        for period, groups in periods.items()
+                        if (start is None or period >= period_of(start.isoformat(), granularity))
+                        and (end is None or period <= period_of(end.isoformat(), granularity))
+                        for group, value in groups.items()]
+            table = pd.DataFrame(rows, columns=["Period"] + spec["groups"] + ["Value"])
+            table = table.sort_values(["Period"] + spec["groups"]).reset_index(drop=True)
+            timing.set(rows=len(table))
+        return table
+
+    def record_added(self, name, record):
+        # A row was appended to dataset `name`
+        self.records_added(name, [record])
+
+    def dataset_changing(self, name):
+        # Called right before this process changes dataset `name`: if its files changed
+        # since the totals were summed, another process wrote to them in the meantime
+        if name not in SOURCES:
+            return
+        with self._lock:
+            if self._totals is not None and self._storage.signature(name) != self._signatures.get(name):
+                self._stale.add(name)
+
+    def records_added(self, name, records):
+        if name not in SOURCES:
+            return
+        with self._lock:
+            if self._totals is None:
+                self._load()  # The load already sees the new row
+                return
+            if self._rebuild_stale(name):
+                return
+            for metric, spec in METRICS.items():
+                if spec["dataset"] == name:
+                    for day, groups in record_totals(records, metric).items():
+                        self._add_day(metric, day, groups)
+            self._signatures[name] = self._storage.signature(name)
+            self._schedule_save()
+
+    def rows_moved(self, name):
+        # The files of `name` were rewritten without changing its rows (e.g. archived)
+        self.records_added(name, [])
+
+    def day_changed(self, name, day):
+        # Rows of dataset `name` on `day` were changed in place: sum that day again
+        if name not in SOURCES:
+            return
+        with self._lock:
+            if self._totals is None:
+                self._load()
+                return
+            if self._rebuild_stale(name):
+                return
+            as_date = date.fromisoformat(day)
+            rows = self._storage.read_range(name, as_date, as_date)
+            for metric, spec in METRICS.items():
+                if spec["dataset"] == name:
+                    old = self._totals[metric]["Daily"].get(day, {})
+                    new = daily_totals(rows, metric).get(day, {})
+                    difference = {group: new.get(group, 0) - old.get(group, 0) for group in set(old) | set(new)}
+                    self._add_day(metric, day, difference)
+            self._signatures[name] = self._storage.signature(name)
+            self._schedule_save()
+
+    def dataset_replaced(self, name):
+        if name not in SOURCES:
+            return
+        with self._lock:
+            if self._totals is None:
+                self._load()
+                return
+            self._rebuild(name)
+            self._schedule_save()
+
+    def _add_day(self, metric, day, groups):
+        for granularity in GRANULARITIES:
+            totals = self._totals[metric][granularity].setdefault(period_of(day, granularity), {})
+            for group, value in groups.items():
+                totals[group] = totals.get(group, 0) + value
+                if abs(totals[group]) < 1e-9:
+                    del totals[group]
+
+    def _refresh(self):
+        # Load the totals, and sum again the datasets another process has changed since
+        with self._lock:
+            if self._totals is None:
+                self._load()
+                return
+            changed = [name for name in sorted(SOURCES)
+                       if self._storage.signature(name) != self._signatures.get(name)]
+            for name in changed:
+                self._rebuild(name)
+            if changed:
+                self._schedule_save()
+
+    def _rebuild_stale(self, name):
+        # Sum `name` again (with this process's change) if another process changed it too
+        if name not in self._stale:
+            return False
+        self._rebuild(name)
+        self._schedule_save()
+        return True
+
+    def _rebuild(self, name):
+        self._stale.discard(name)
+        self._signatures[name] = self._storage.signature(name)
+        data = self._storage.read(name)
+        with span("rollups rebuild", dataset=name, rows=len(data)):
+            for metric, spec in METRICS.items():
+                if spec["dataset"] == name:
+                    self._totals[metric] = {granularity: {} for granularity in GRANULARITIES}
+                    for day, groups in daily_totals(data, metric).items():
+                        self._add_day(metric, day, groups)
+
+    def _load(self):
+        if self._totals is not None:
+            return
+        saved = {}
+        if self._state_path and os.path.exists(self._state_path):
+            try:
+                with open(self._state_path, encoding="utf-8") as f:
+                    saved = json.load(f)
+            except (OSError, ValueError):
+                saved = {}
+
+        self._totals = {}
+        stale = {name for name in SOURCES
+                 if saved.get("signatures", {}).get(name) != self._storage.signature(name)}
+        stale |= {spec["dataset"] for metric, spec in METRICS.items() if metric not in saved.get("totals", {})}
+        self._signatures = {name: saved.get("signatures", {}).get(name) for name in SOURCES - stale}
+        for metric, spec in METRICS.items():
+            if spec["dataset"] not in stale:
+                self._totals[metric] = {
+                    granularity: {period: {tuple(row[:-1]): row[-1] for row in rows}
+                                  for period, rows in saved["totals"][metric][granularity].items()}
+                    for granularity in GRANULARITIES
+                }
+        for name in sorted(stale):
+            self._rebuild(name)
+        if stale:
+            self._schedule_save()
+
+    def _schedule_save(self):
+        # Changes come in bursts, so the file is written once things go quiet
+        if not self._state_path:
+            return
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+        self._save_timer = threading.Timer(2.0, self.save)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def save(self):
+        if not self._state_path:
+            return
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()  # Saved now, no need to wait for the timer
+            if self._totals is None:
+                return
+            state = {
+                # What the totals were summed from, not what's on disk now: a change by
+                # another process since then is picked up on the next start
+                "signatures": dict(self._signatures),
+                "totals": {
+                    metric: {granularity: {period: [[*group, value] for group, value in groups.items()]
+                                           for period, groups in periods.items()}
+                             for granularity, periods in by_granularity.items()}
+                    for metric, by_granularity in self._totals.items()
+                },
+            }
+            temp_path = self._state_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(temp_path, self._state_path)
@@ -0,0 +1,243 @@
+# What every dataset looks like
+#
+# Each dataset's columns are listed with their kind, which decides how the column is
+# held in memory, stored in SQLite and checked:
+#   - "date" / "timestamp": text written in one fixed format, never guessed
+#   - "category": text with few different values (categories, brands, choices), kept
+#     as a pandas categorical, so each value is stored once
+#   - "text": free text
+#   - "quantity": float32, plenty for quarter crates and weights in pounds
+#   - "count": whole numbers (nullable Int32)
+#   - "money": float64, so cents aren't rounded away
+# The storage backends read and write every file through here, so a file whose columns
+# or dates don't match is caught when it is read instead of somewhere down the line.
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+KINDS = {
+    "date": {"dtype": "category", "sql": "TEXT", "format": "%Y-%m-%d"},
+    "timestamp": {"dtype": None, "sql": "TEXT", "format": "%Y-%m-%d %H:%M:%S"},
+    "category": {"dtype": "category", "sql": "TEXT"},
+    "text": {"dtype": None, "sql": "TEXT"},
+    "quantity": {"dtype": "float32", "sql": "REAL"},
+    "count": {"dtype": "Int32", "sql": "INTEGER"},
+    "money": {"dtype": "float64", "sql": "REAL"},
+}
+
+# Every dataset the app keeps: the CSV file it lives in, its columns with their kind and
+# the columns that get indexed in the database. "append_only" files only ever get rows
+# added at the end (or are replaced as a whole), so reads can pick up just the new rows.
+# Closed months of "archive" datasets can be moved to the Parquet archive, see archive.py
+DATASETS = {
+    "products": {
+        "file": "product_data.csv",
+        "partitions": "product_data",  # One CSV per month in this folder, see CsvStorage
+        "archive": True,
+        "columns": {"Date": "date", "Category": "category", "Product": "category", "Count Method": "category",
+                    "Product Distributed": "quantity", "Product Left": "quantity",
+                    "Total Product Distributed": "quantity"},
+        "index": ["Date", "Category", "Product", "Count Method"],
+    },
+    "walk_in_menu": {
+        "file": "walk_in_menu.csv",
+        "columns": {"Product": "text"},
+        "index": [],
+    },
+    "removed_products": {
+        # Append-only log of REMOVE clicks from every tablet
+        "file": "removed_products.csv",
+        "append_only": True,
+        "columns": {"Product": "category", "Date": "date", "Timestamp": "timestamp", "Session": "text"},
+        "index": ["Date"],
+        "day_index": "removed_products.idx",  # Byte offset of each day's first row, see CsvStorage
+    },
+    "donated": {
+        "file": "donated_products.csv",
+        "append_only": True,
+        "archive": True,
+        "columns": {"Date": "date", "Product Name": "category", "Donation Weight (lbs)": "quantity",
+                    "Donation Provider": "category", "Donor Details": "text", "Contents": "category",
+                    "Other Contents Details": "text", "Additional Notes": "text"},
+        "index": ["Date"],
+    },
+    "spoiled": {
+        "file": "spoiled_food.csv",
+        "append_only": True,
+        "archive": True,
+        "columns": {"Date": "date", "Total Item Weight (lbs.)": "quantity", "Source of Items": "category",
+                    "Source Details": "text", "Contents": "category", "Contents Details": "text",
+                    "Additional Notes about Contents": "text", "Destination": "category",
+                    "Destination Details": "text", "Reasons": "category", "Reasons Details": "text",
+                    "Additional Notes": "text"},
+        "index": ["Date"],
+    },
+    "menstrual": {
+        "file": "menstrual_products.csv",
+        "append_only": True,
+        "columns": {"Date": "timestamp", "Brand": "category", "Product Type": "category", "Quantity": "count"},
+        "index": ["Date"],
+        "sorted_by_date": True,  # Stamped with the time of the submit, so rows arrive in date order
+    },
+    "planB": {
+        "file": "planB_data.csv",
+        "append_only": True,
+        "columns": {"Date": "timestamp", "Age": "count", "Gender Identity": "category",
+                    "Racial Background": "category", "Financial Background": "category", "Annual Income": "money",
+                    "Barrier From Obtaining Plan B": "category"},
+        "index": ["Date"],
+        "sorted_by_date": True,
+    },
+}
+
+
+class SchemaError(ValueError):
+    """A file or a write doesn't match its dataset's columns."""
+
+
+def columns_of(name):
+    return list(DATASETS[name]["columns"])
+
+
+def sql_type(name, column):
+    return KINDS[DATASETS[name]["columns"][column]]["sql"]
+
+
+def dtypes(name, compact=True):
+    """Column -> pandas dtype for `name`. With compact=False text stays plain text and
+    quantities are float64, for rows that are about to be changed and written back."""
+    types = {}
+    for column, kind in DATASETS[name]["columns"].items():
+        dtype = KINDS[kind]["dtype"]
+        if not compact:
+            dtype = "float64" if kind == "quantity" else None if dtype == "category" else dtype
+        if dtype is not None:
+            types[column] = dtype
+    return types
+
+
+def read_csv(source, name, compact=True, check_columns=True, label=None):
+    """pd.read_csv with `name`'s column types instead of guessed ones.
+
+    `source` is a path or a file-like object. Raises SchemaError if the file's columns
+    aren't the dataset's (unless check_columns is False). A number column holding
+    something else is kept as text with a warning, so the file can still be fixed.
+    """
+    label = label or (source if isinstance(source, str) else DATASETS[name]["file"])
+    types = dtypes(name, compact)
+
+    # Nullable whole numbers parse slowly, so those columns are converted afterwards
+    try:
+        data = pd.read_csv(source, dtype={column: dtype for column, dtype in types.items() if dtype != "Int32"})
+    except (ValueError, TypeError):
+        # Read the numbers as text, the columns that can be are converted below
+        if not isinstance(source, str):
+            source.seek(0)
+        data = pd.read_csv(source, dtype={column: dtype for column, dtype in types.items() if dtype == "category"})
+    if check_columns and list(data.columns) != columns_of(name):
+        raise SchemaError(f"{label} has columns {list(data.columns)}, expected {columns_of(name)}")
+
+    for column, dtype in types.items():
+        if column not in data.columns or data[column].dtype == dtype:
+            continue
+        try:
+            data[column] = pd.to_numeric(data[column]).astype(dtype)
+        except (ValueError, TypeError):
+            warnings.warn(f"{label}: column '{column}' has values that aren't numbers, kept as text", stacklevel=2)
+
+    for column, kind in DATASETS[name]["columns"].items():
+        if kind == "date" and column in data.columns and isinstance(data[column].dtype, pd.CategoricalDtype):
+            # Each different date is checked once
+            bad = bad_dates(pd.Series(data[column].cat.categories), KINDS[kind]["format"])
+            if bad:
+                warnings.warn(f"{label}: column '{column}' has dates not written as "
+                              f"{KINDS[kind]['format']}, e.g. '{bad[0]}'", stacklevel=2)
+    return data
+
+
+def apply_types(name, data):
+    # Give a frame read some other way (e.g. from SQLite) the dataset's column types
+    for column, dtype in dtypes(name).items():
+        if column in data.columns and data[column].dtype != dtype:
+            try:
+                data[column] = data[column].astype(dtype)
+            except (ValueError, TypeError):
+                pass  # Left as it is, like read_csv does
+    return data
+
+
+def exact_values(values):
+    """A number column as float64 with the values as they were written.
+
+    A float32 column (a "quantity") holds the float32 nearest to what was typed, e.g.
+    0.1 as 0.10000000149. Its shortest text is what was typed, so sums that get saved
+    start from that. Each different value is converted once.
+    """
+    values = pd.to_numeric(values, errors="coerce")
+    if values.dtype != "float32":
+        return values.astype(float)
+    codes, uniques = pd.factorize(values)
+    exact = np.asarray(uniques).astype(str).astype(float)
+    return pd.Series(np.where(codes >= 0, exact[codes] if len(exact) else np.nan, np.nan), index=values.index)
+
+
+def concat_frames(frames):
+    """pd.concat for frames of one dataset that keeps categorical columns categorical.
+
+    pd.concat turns categoricals with different categories (frames read from different
+    files) back into plain text, so every frame is given the same categories first. Only
+    the small codes are renumbered, the text is never parsed again.
+    """
+    categorical = [column for column in frames[0].columns if isinstance(frames[0][column].dtype, pd.CategoricalDtype)]
+    frames = [frame.copy(deep=False) for frame in frames]
+    for column in categorical:
+        if any(not isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            continue  # Left to pd.concat, and made categorical below
+        categories = pd.Index(pd.unique(pd.concat([pd.Series(frame[column].cat.categories) for frame in frames])))
+        for frame in frames:
+            if not frame[column].cat.categories.equals(categories):
+                frame[column] = frame[column].cat.set_categories(categories)
+    data = pd.concat(frames, ignore_index=True)
+    return data.astype({column: "category" for column in categorical if data[column].dtype != "category"})
+
+
+def bad_dates(values, date_format):
+    # The values that aren't missing and don't follow `date_format`
+    text = values.dropna().astype(str)
+    parsed = pd.to_datetime(text, format=date_format, errors="coerce")
+    return text[parsed.isna()].tolist()
+
+
+def check_frame(name, data):
+    """Return `data` with `name`'s columns in order, before a whole dataset is written.
+
+    Raises SchemaError for columns the dataset doesn't have or dates that aren't in the
+    dataset's format.
+    """
+    unknown = [column for column in data.columns if column not in DATASETS[name]["columns"]]
+    if unknown:
+        raise SchemaError(f"{name} has no columns {unknown}")
+    for column, kind in DATASETS[name]["columns"].items():
+        if "format" in KINDS[kind] and column in data.columns:
+            bad = bad_dates(pd.Series(data[column].unique()), KINDS[kind]["format"])
+            if bad:
+                raise SchemaError(f"{name}: {column} '{bad[0]}' isn't written as {KINDS[kind]['format']}")
+    return data.reindex(columns=columns_of(name))
+
+
+def check_records(name, records):
+    """Raise SchemaError if a record about to be added has unknown columns or badly
+    written dates."""
+    for record in records:
+        unknown = [column for column in record if column not in DATASETS[name]["columns"]]
+        if unknown:
+            raise SchemaError(f"{name} has no columns {unknown}")
+        for column, kind in DATASETS[name]["columns"].items():
+            value = record.get(column)
+            if "format" in KINDS[kind] and isinstance(value, str):
+                try:
+                    datetime.strptime(value, KINDS[kind]["format"])
+                except ValueError:
+                    raise SchemaError(f"{name}: {column} '{value}' isn't written as {KINDS[kind]['format']}") from None
@@ -0,0 +1,122 @@
+# Styling and background images shared by every page
+#
+# Everything here is worked out once when the module is first imported, not on every
+# rerun. The background images are served by Streamlit itself from the static/ folder
+# (see .streamlit/config.toml), so the tablets never reach outside hosts and the app
+# looks the same offline. They aren't part of the checkout; download and shrink them
+# once with:
+#   python static_assets.py fetch
+# Until then the pages have a plain white background.
+import io
+import os
+import sys
+import urllib.request
+
+STATIC_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_URL = "app/static"  # Where Streamlit serves the static/ folder
+
+# Local file name -> where it originally comes from and the largest width worth sending
+BACKGROUND_IMAGES = {
+    "pantry-logo.png": {
+        "url": "https://thepantry.ucdavis.edu/sites/g/files/dgvnsk13406/files/logo-white-transparentbg.png",
+        "max_width": 330,  # Shown 165px wide, twice that for sharp screens
+        "size": "165px",
+    },
+    "background.jpg": {
+        "url": "https://static.vecteezy.com/system/resources/previews/009/003/028/non_2x/"
+               "organic-food-and-fruit-shopping-background-free-vector.jpg",
+        "max_width": 1920,
+        "size": "cover",
+    },
+}
+
+
+def background_css():
+    # Only the images bundled in static/ are shown. A missing one is left out, not loaded
+    # from where it originally comes from
+    files = [file_name for file_name in BACKGROUND_IMAGES if os.path.exists(os.path.join(STATIC_DIRECTORY, file_name))]
+    if not files:
+        return ""
+    images = ", ".join(f"url('{STATIC_URL}/{file_name}')" for file_name in files)
+    sizes = ", ".join(BACKGROUND_IMAGES[file_name]["size"] for file_name in files)
+    return f"""background-image: {images};
+        background-size: {sizes};
+        background-position: 85% 20%; /* Move logo slightly left and down */
+        background-repeat: no-repeat;
+        background-attachment: fixed;"""
+
+
+# CSS for styling
+PAGE_CSS = f"""
+<style>
+    [data-testid="stAppViewContainer"] {{
+        {background_css()}
+    }}
+    [data-testid="stHeader"] {{
+        background: rgba(0,0,0,0);
+    }}
+
+    /* Force all text inside radio buttons to be black */
+    div[role="radiogroup"] * {{
+        color: black !important;
+    }}
+
+    /* Ensure all text in widgets, headers, and labels is black */
+    .stTabs [role="tab"],
+    html, body, .stMarkdown, .stTextInput, .stSelectbox, .stHeader, .stSubHeader,
+    h1, h2, h3, h4, h5, h6, .stHeader, label[data-testid="stWidgetLabel"] {{
+        color: black !important;
+    }}
+
+    /* General Notification Styling */
+    div[data-testid="stNotification"] {{
+        padding: 10px !important;
+        border-radius: 5px !important;
+        color: black !important;
+    }}
+
+    /* Ensure background does not override the text color */
+    .stApp {{
+        background-color: white !important;
+    }}
+</style>
+"""
+
+
+def optimize_image(data, file_name, max_width):
+    """Shrink an image to `max_width` and recompress it. Needs Pillow; without it the
+    image is kept as downloaded."""
+    try:
+        from PIL import Image
+    except ImportError:
+        print("Pillow is not installed, saving the image as downloaded")
+        return data
+    image = Image.open(io.BytesIO(data))
+    if image.width > max_width:
+        image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+    output = io.BytesIO()
+    if file_name.endswith(".png"):
+        image.save(output, "PNG", optimize=True)
+    else:
+        image.convert("RGB").save(output, "JPEG", quality=80, optimize=True, progressive=True)
+    return output.getvalue() if len(output.getvalue()) < len(data) else data
+
+
+def fetch_images():
+    os.makedirs(STATIC_DIRECTORY, exist_ok=True)
+    for file_name, image in BACKGROUND_IMAGES.items():
+        request = urllib.request.Request(image["url"], headers={"User-Agent": "Mozilla/5.0"})
+        with urllib.request.urlopen(request, timeout=30) as response:
+            data = response.read()
+        optimized = optimize_image(data, file_name, image["max_width"])
+        with open(os.path.join(STATIC_DIRECTORY, file_name), "wb") as f:
+            f.write(optimized)
+        print(f"{file_name}: {len(data) // 1024} KB -> {len(optimized) // 1024} KB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["fetch"]:
+        fetch_images()
+    else:
+        print("usage: python static_assets.py fetch")
+        sys.exit(1)
@@ -0,0 +1,1737 @@
+# Storage layer for the pantry's data
+#
+# Every tab goes through a storage object instead of opening files directly. Two
+# backends are available and picked with the PANTRY_STORAGE environment variable:
+#   - "csv" (default): the loose CSV files next to the app, as before
+#   - "sqlite": a single SQLite database (PANTRY_DB, default pantry.db) with indexes
+# With PANTRY_WRITE_BEHIND=1 the CSV backend saves entries to a journal first and
+# writes them to the data files in the background, see WriteJournal.
+#
+# Existing CSVs can be imported into the database once with:
+#   python storage.py migrate
+# Closed months of the CSV backend can be moved to the compressed archive (archive.py) with:
+#   python storage.py compact [MONTHS]
+import atexit
+import csv
+import io
+import json
+import os
+import queue
+import sqlite3
+import stat
+import sys
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from archive import (ARCHIVE_DIRECTORY, already_archived, archive_available, archived_batches, read_archive,
+                     write_archive)
+from instrumentation import span
+from rollups import Rollups
+from schemas import DATASETS, apply_types, check_frame, check_records, columns_of, concat_frames, read_csv, sql_type
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+current_directory = os.getcwd()  # Data lives in the current working directory, like before
+
+# Rows of product data with the same key are merged into one by adding up their quantities
+PRODUCT_KEY = DATASETS["products"]["index"]
+
+
+def merge_product_rows(data):
+    with span("merge product rows", rows=len(data)) as timing:
+        merged = data.groupby(PRODUCT_KEY, as_index=False).sum()
+        timing.set(merged_rows=len(merged))
+    return merged
+
+
+def new_product_row(date, category, product, count_method, quantity, products_left=0):
+    return {
+        "Date": date,
+        "Category": category,
+        "Product": product,
+        "Count Method": count_method,
+        "Product Distributed": quantity,
+        "Product Left": products_left,
+        "Total Product Distributed": quantity - products_left
+    }
+
+
+def add_rows(data, rows):
+    # pd.concat of a frame with a one-row frame, skipping the empty side so dtypes stay as read
+    new_rows = pd.DataFrame(rows, columns=data.columns)
+    return new_rows if data.empty else pd.concat([data, new_rows], ignore_index=True)
+
+
+def key_index(data):
+    # Map (Date, Category, Product) to the positions of the rows with that key
+    if data.empty:
+        return {}
+    return data.groupby(["Date", "Category", "Product"], sort=False).indices
+
+
+def set_product_left_in(data, index, date, category, product, count_method, products_left):
+    """Return `data` with the end-of-day count set on the matching product record.
+
+    `index` is key_index(data). Among the rows for (date, category, product) only those
+    with the same count method are updated; if there are several they are merged into
+    one. Without a matching row a new one is added with nothing distributed.
+    """
+    positions = [position for position in index.get((date, category, product), [])
+                 if data.iloc[position]["Count Method"] == count_method]
+    if not positions:
+        return add_rows(data, [new_product_row(date, category, product, count_method, 0, products_left)])
+
+    data = data.reset_index(drop=True)
+    for column in ["Product Distributed", "Product Left", "Total Product Distributed"]:
+        data[column] = data[column].astype(float)
+    distributed = data.loc[positions, "Product Distributed"].sum()
+    first = positions[0]
+    data.at[first, "Product Distributed"] = distributed
+    data.at[first, "Product Left"] = products_left
+    data.at[first, "Total Product Distributed"] = distributed - products_left
+    return data.drop(index=positions[1:]).reset_index(drop=True)
+
+
+def month_of(date):
+    # "2025-02-14" (or a date object) -> "2025-02", the partition the date belongs to
+    return str(date)[:7]
+
+
+def months_before(months, today=None):
+    # First month that is still kept in the CSV files when archiving after `months`
+    # months, e.g. 12 in 2026-10 -> "2025-10"
+    today = today or datetime.today().date()
+    index = today.year * 12 + today.month - 1 - months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def date_bounds(start, end):
+    # Dates are stored as "YYYY-MM-DD" or "YYYY-MM-DD HH:MM:SS", so a range of days can be
+    # compared as text: start <= Date < the day after end
+    return start.isoformat(), (end + timedelta(days=1)).isoformat()
+
+
+def append_record(file_path, record, columns):
+    """Add one row to the end of a CSV file, returning its byte offset. See append_records."""
+    return append_records(file_path, [record], columns)[0]
+
+
+def append_records(file_path, records, columns):
+    """Add rows to the end of a CSV file without reading or rewriting earlier rows.
+
+    The header is written the first time the file is created. If the file already
+    exists its header has to match `columns`, otherwise a ValueError is raised so a
+    row never ends up under the wrong columns. All rows go out in a single write.
+    Returns the byte offset of each new row.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    with span("append rows", file=os.path.basename(file_path), rows=len(records)) as timing, \
+            open(file_path, "ab+") as f:
+        # Only the header line is read, the rest of the file is never touched
+        f.seek(0)
+        header = f.readline().decode("utf-8-sig").strip("\r\n")
+
+        if not header:
+            writer.writerow(columns)
+        else:
+            existing_columns = next(csv.reader([header]))
+            if existing_columns != list(columns):
+                raise ValueError(
+                    f"{os.path.basename(file_path)} has columns {existing_columns}, expected {list(columns)}"
+                )
+            # Make sure the new row starts on its own line
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                buffer.write("\n")
+
+        end = f.seek(0, os.SEEK_END)
+        offsets = []
+        for record in records:
+            offsets.append(end + len(buffer.getvalue().encode("utf-8")))
+            writer.writerow([record.get(column, "") for column in columns])
+        f.write(buffer.getvalue().encode("utf-8"))
+        timing.set(bytes=f.tell() - end)
+    return offsets
+
+
+def end_last_line(f):
+    # Before appending to a file opened for reading and writing: finish a last line cut
+    # off by a crash, so the next one doesn't get glued onto it
+    end = f.seek(0, os.SEEK_END)
+    if end:
+        f.seek(end - 1)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def lines_from_end(f, start, end):
+    # Yield (offset, line) for every line between byte `start` and `end` of a binary file,
+    # starting with the last one, reading the file backwards in chunks
+    position = end
+    remainder = b""
+    while position > start:
+        step = min(65536, position - start)
+        position -= step
+        f.seek(position)
+        parts = (f.read(step) + remainder).split(b"\n")
+        remainder = parts.pop(0)
+        offsets = []
+        offset = position + len(remainder) + 1
+        for part in parts:
+            offsets.append(offset)
+            offset += len(part) + 1
+        for offset, part in reversed(list(zip(offsets, parts))):
+            if part.strip():
+                yield offset, part
+    if remainder.strip():
+        yield start, remainder
+
+
+def read_date_block(file_path, date):
+    """Read the rows at the end of a date-sorted CSV that belong to `date`.
+
+    Returns (header, offset, lines, last_date): the header line, the byte offset where
+    the block starts, the block's lines in file order and the latest date in the file.
+    Only the end of the file is read, so the cost depends on the size of the block.
+    """
+    with span("read date block", file=os.path.basename(file_path)) as timing, open(file_path, "rb") as f:
+        header = f.readline()
+        end = f.seek(0, os.SEEK_END)
+        offset = end
+        lines = []
+        last_date = None
+        for line_offset, line in lines_from_end(f, len(header), end):
+            line_date = next(csv.reader([line.decode("utf-8")]))[0]
+            if last_date is None:
+                last_date = line_date
+            if line_date != date:
+                break
+            offset = line_offset
+            lines.append(line)
+        timing.set(rows=len(lines), bytes=end - offset)
+    lines.reverse()
+    return header, offset, lines, last_date
+
+
+def looks_like_date(value):
+    return len(value) >= 10 and value[4] == "-" and value[7] == "-" and value[:4].isdigit()
+
+
+def find_date_offset(f, date_column, target):
+    """Byte offset of the first row whose Date is on or after `target` in a date-sorted CSV.
+
+    Binary search over the file's bytes, so only a few lines are read however long the
+    file is. Lines that don't start a row (a quoted field spanning lines) are stepped over.
+    """
+    f.seek(0)
+    low = len(f.readline())
+    high = f.seek(0, os.SEEK_END)
+    while low < high:
+        middle = (low + high) // 2
+        f.seek(middle - 1)
+        f.readline()  # Move to the start of the next line
+        row_date = None
+        while row_date is None and f.tell() < high:
+            line = f.readline()
+            fields = next(csv.reader([line.decode("utf-8", errors="replace")]), [])
+            if len(fields) > date_column and looks_like_date(fields[date_column]):
+                row_date = fields[date_column]
+                # Read the rest of the row if a quoted field carries on over more lines
+                while line.count(b'"') % 2 == 1:
+                    more = f.readline()
+                    if not more:
+                        break
+                    line += more
+        if row_date is None or row_date >= target:
+            high = middle
+        else:
+            low = f.tell()
+    return low
+
+
+def write_from_offset(file_path, offset, data):
+    """Replace everything after `offset` with the rows in `data`, leaving earlier rows alone.
+
+    The new rows are saved next to the file first (.<file>.block-<offset>, swapped in
+    whole like write_csv_atomic), so a crash in the middle of the rewrite can't lose
+    them: finish_block_writes writes them again.
+    """
+    with span("write date block", file=os.path.basename(file_path), rows=len(data)) as timing:
+        block = data.to_csv(header=False, index=False, lineterminator="\n").encode("utf-8")
+        with open(file_path, "rb") as f:
+            if offset > 0:
+                f.seek(offset - 1)
+                if f.read(1) != b"\n":
+                    block = b"\n" + block
+        timing.set(bytes=len(block))
+        directory, file = os.path.split(os.path.abspath(file_path))
+        redo_path = os.path.join(directory, f".{file}.block-{offset}")
+        handle, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+        try:
+            with os.fdopen(handle, "wb") as f:
+                f.write(block)
+                f.flush()
+                os.fsync(f.fileno())
+            keep_permissions(temp_path, file_path)
+            os.replace(temp_path, redo_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        write_at(file_path, offset, block)
+        os.remove(redo_path)
+
+
+def write_at(file_path, offset, block):
+    # Write `block` at `offset`, dropping whatever came after it
+    with open(file_path, "r+b") as f:
+        f.seek(offset)
+        f.write(block)
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def finish_block_writes(directory):
+    # Write again every block whose rewrite (see write_from_offset) was cut off
+    try:
+        files = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    for file in files:
+        name, separator, offset = file.rpartition(".block-")
+        if not (file.startswith(".") and separator and offset.isdigit()):
+            continue
+        redo_path = os.path.join(directory, file)
+        with open(redo_path, "rb") as f:
+            block = f.read()
+        write_at(os.path.join(directory, name[1:]), int(offset), block)
+        frame_cache.invalidate(os.path.join(directory, name[1:]))
+        os.remove(redo_path)
+
+
+def write_csv_atomic(file_path, data, header=True):
+    # Write to a temporary file next to the real one and swap it in, so readers and a
+    # crash mid-write only ever see the old file or the complete new one
+    directory = os.path.dirname(os.path.abspath(file_path))
+    handle, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".csv", dir=directory)
+    try:
+        with span("write csv", file=os.path.basename(file_path), rows=len(data)) as timing:
+            with os.fdopen(handle, "w", newline="", encoding="utf-8") as f:
+                data.to_csv(f, index=False, header=header, lineterminator="\n")
+                f.flush()
+                os.fsync(f.fileno())
+                timing.set(bytes=f.tell())
+            keep_permissions(temp_path, file_path)
+            os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def keep_permissions(temp_path, file_path):
+    # mkstemp files can only be read by their owner. The file swapped in for `file_path`
+    # gets the permissions it had, or the ones any new file would get
+    try:
+        mode = stat.S_IMODE(os.stat(file_path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~current_umask()
+    os.chmod(temp_path, mode)
+
+
+def current_umask():
+    # Read from /proc where there is one: os.umask can only be read by setting it, which
+    # changes it for every thread for that moment
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except OSError:
+        pass
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+@contextmanager
+def file_lock(lock_path):
+    # Exclusive OS-level lock, so app processes sharing the data directory write one at a time
+    with open(lock_path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class WriteCoordinator:
+    """Applies every change to the data files from a single writer thread.
+
+    Sessions hand their change to apply() and wait for its result. The writer takes
+    everything queued at that moment, applies it in submission order while holding the
+    lock file, and reports back to each session. Bursts of submits therefore share one
+    lock acquisition instead of fighting over the files, and no update can be lost
+    between one session's read and its write.
+
+    Changes sent with apply_batched() that sit next to each other in the queue and use
+    the same function are handed to it together as one list, so a burst of them costs a
+    single write.
+    """
+
+    def __init__(self, lock_path, max_batch=100):
+        self.lock_path = lock_path
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def apply(self, change, *args):
+        # A change that itself writes runs straight away instead of waiting on itself
+        if threading.current_thread() is self._thread:
+            return change(*args)
+        return self._submit(change, args, False)
+
+    def apply_batched(self, change_many, item):
+        if threading.current_thread() is self._thread:
+            return change_many([item])
+        return self._submit(change_many, item, True)
+
+    def apply_later(self, change, *args):
+        # Queue a change without waiting for it, returning its Future
+        return self._submit(change, args, False, wait=False)
+
+    def _submit(self, change, args, batched, wait=True):
+        self._start()
+        future = Future()
+        self._queue.put((change, args, batched, future))
+        return future.result() if wait else future
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="pantry-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            with span("write batch", changes=len(batch)), file_lock(self.lock_path):
+                while batch:
+                    change, args, batched, future = batch.pop(0)
+                    if not batched:
+                        self._finish([future], lambda: change(*args))
+                        continue
+                    items, futures = [args], [future]
+                    while batch and batch[0][0] == change and batch[0][2]:
+                        _, item, _, future = batch.pop(0)
+                        items.append(item)
+                        futures.append(future)
+                    self._finish(futures, lambda: change(items))
+
+    def _finish(self, futures, run):
+        try:
+            result = run()
+        except BaseException as e:
+            for future in futures:
+                future.set_exception(e)
+        else:
+            for future in futures:
+                future.set_result(result)
+
+
+class WriteJournal:
+    """Entries saved to disk before they are written to the data files.
+
+    Each entry is one JSON line [operation, arguments], flushed to disk (fsync) before
+    add() returns, so a submit can be confirmed straight away. Whoever applies entries
+    appends {"applied": offset} as soon as the entries before that byte offset are in
+    the data files (after each run of entries written together), and empties the journal
+    when nothing else is waiting. Entries after the last mark are applied on the next
+    start, so nothing confirmed is lost in a crash. Only the run of entries that was
+    being written right when the app stopped can be applied twice.
+
+    Entries that couldn't be applied, and lines that can't be read (the end of a line
+    cut off by a crash), are moved to the .failed file. They stay there, shown on the
+    Diagnostics page, until someone tries them again or discards them.
+
+    The journal has its own lock file, held only for a moment, so adding an entry never
+    waits for the data files' lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.failed_path = path + ".failed"
+        self._lock_path = path + ".lock"
+        self._lock = threading.Lock()
+
+    def add(self, operation, *args):
+        line = json.dumps([operation, args], default=lambda value: value.item() if hasattr(value, "item") else str(value))
+        with span("journal add", entry=operation), self._lock, file_lock(self._lock_path), \
+                open(self.path, "ab+") as f:
+            end_last_line(f)
+            f.write(line.encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def pending(self):
+        """Return [(operation, arguments, offset the entry ends at)] for the entries not
+        applied yet."""
+        with self._lock, file_lock(self._lock_path):
+            try:
+                f = open(self.path, "r+b")
+            except FileNotFoundError:
+                return []
+            with f:
+                size = f.seek(0, os.SEEK_END)
+                # The newest mark says where the entries still to apply start
+                start = 0
+                for offset, line in lines_from_end(f, 0, size):
+                    if line.startswith(b"{"):
+                        try:
+                            start = json.loads(line)["applied"]
+                            break
+                        except (ValueError, KeyError):
+                            pass  # A mark cut off by a crash
+                f.seek(start)
+                content = f.read(size - start)
+                entries = []
+                unreadable = []
+                for line in content.splitlines(keepends=True):
+                    offset = start
+                    start += len(line)
+                    try:
+                        entry = json.loads(line) if line.strip() else {}
+                    except ValueError as e:
+                        unreadable.append({"entry": None, "line": line.decode("utf-8", errors="replace").strip(),
+                                           "error": f"Unreadable journal line: {e}"})
+                        # Blanked out where it is, so the offsets of the other lines stay right
+                        f.seek(offset)
+                        if line.endswith(b"\n"):
+                            f.write(b" " * (len(line) - 1))
+                        else:
+                            f.truncate(offset)  # The last line, cut off by a crash
+                        continue
+                    if not isinstance(entry, dict):
+                        entries.append((*entry, start))
+                if unreadable:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    self._append_failed(unreadable)
+        return entries
+
+    def mark_applied(self, offset):
+        with self._lock, file_lock(self._lock_path), open(self.path, "r+b") as f:
+            f.seek(offset)
+            if all(line.startswith(b"{") or not line.strip() for line in f.read().splitlines()):
+                f.truncate(0)  # Everything is applied (only earlier marks come after it), start over
+            else:
+                end_last_line(f)
+                f.write(json.dumps({"applied": offset}).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def add_failed(self, failures):
+        # failures: [{"entry": [operation, arguments], "error": ...}]
+        with self._lock, file_lock(self._lock_path):
+            self._append_failed(failures)
+
+    def failed(self):
+        """Return the entries in the .failed file, oldest first, as dicts with "entry"
+        ([operation, arguments], or None for a line that couldn't be read), "error" and
+        "time"."""
+        with self._lock, file_lock(self._lock_path):
+            try:
+                with open(self.failed_path, encoding="utf-8") as f:
+                    return [json.loads(line) for line in f if line.strip()]
+            except FileNotFoundError:
+                return []
+
+    def set_failed(self, failures):
+        # Replace what's in the .failed file, once entries were tried again or discarded
+        with self._lock, file_lock(self._lock_path):
+            temp_path = self.failed_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for failure in failures:
+                    f.write(json.dumps(failure) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.failed_path)
+
+    def _append_failed(self, failures):
+        time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with open(self.failed_path, "ab+") as f:
+            end_last_line(f)
+            for failure in failures:
+                print(f"Journal entry moved to {os.path.basename(self.failed_path)}: {failure}", file=sys.stderr)
+                f.write(json.dumps(dict(failure, time=time), default=str).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def read_csv_file(path, name, compact=True):
+    # One of dataset `name`'s files, with the column types from schemas.py
+    with span("read csv", file=os.path.basename(path), bytes=os.path.getsize(path)) as timing:
+        data = read_csv(path, name, compact, label=os.path.basename(path))
+        timing.set(rows=len(data))
+    return data
+
+
+# How much of the end of the parsed part of a file is remembered, to tell later that
+# the file still starts with what was parsed
+TAIL_CHECK_BYTES = 256
+
+
+def read_log_file(path, name):
+    """Read a whole append-only file, returning (frame, state) for read_appended_rows."""
+    with open(path, "rb") as f:
+        inode = os.fstat(f.fileno()).st_ino
+        content = f.read()
+    with span("read csv", file=os.path.basename(path), bytes=len(content)) as timing:
+        data = read_csv(io.BytesIO(content), name, label=os.path.basename(path))
+        timing.set(rows=len(data))
+    header = content[:content.find(b"\n") + 1] if b"\n" in content else content
+    return data, {"inode": inode, "header": header, "offset": len(content), "tail": content[-TAIL_CHECK_BYTES:]}
+
+
+def read_appended_rows(path, name, data, state):
+    """Parse only the rows added to the end of `path` since `data` was read.
+
+    `state` says where the last read stopped. Returns the new (frame, state), or None if
+    the file was replaced, truncated or changed before that point (then it has to be
+    read again from the start). Only whole lines are parsed, so a row still being
+    written by another process is picked up next time.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_ino != state["inode"] or f.seek(0, os.SEEK_END) < state["offset"]:
+            return None
+        f.seek(0)
+        if f.read(len(state["header"])) != state["header"]:
+            return None
+        f.seek(state["offset"] - len(state["tail"]))
+        if f.read(len(state["tail"])) != state["tail"]:
+            return None
+        added = f.read()
+    added = added[:added.rfind(b"\n") + 1]
+    if not added.strip():
+        # Nothing new, or only blank lines
+        return data, dict(state, offset=state["offset"] + len(added))
+    with span("read appended rows", file=os.path.basename(path), bytes=len(added)) as timing:
+        try:
+            rows = read_csv(io.BytesIO(state["header"] + added), name, label=os.path.basename(path))
+        except (ValueError, pd.errors.ParserError):
+            return None
+        timing.set(rows=len(rows))
+    for column in rows.columns:
+        if rows[column].dtype != data[column].dtype and not isinstance(data[column].dtype, pd.CategoricalDtype):
+            if rows[column].notna().any():
+                return None  # e.g. text in a column that was empty so far, read it all again
+            rows[column] = rows[column].astype(data[column].dtype)  # Empty in the new rows
+    data = concat_frames([data, rows])
+    tail = (state["tail"] + added)[-TAIL_CHECK_BYTES:]
+    return data, dict(state, offset=state["offset"] + len(added), tail=tail)
+
+
+class FrameCache:
+    """Parsed CSV files shared by every session on the server.
+
+    Entries are keyed by file path and checked against the file's modification time and
+    size on every lookup, so a file changed outside the app is parsed again. The least
+    recently used entries are dropped once the cache goes over `max_bytes` of memory or
+    `max_entries` files. Cached frames are shared, so callers must not modify them.
+
+    For files that only ever grow at the end, `load` returns (frame, state) and
+    `load_more(path, frame, state)` parses just the rows added since, see
+    read_appended_rows. Anything else means a full `load` again.
+    """
+
+    def __init__(self, max_bytes, max_entries):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # path -> (signature, frame, size in bytes, load_more state)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, path, load, load_more=None):
+        stat = os.stat(path)  # Raises FileNotFoundError like pd.read_csv would
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        loaded = None
+        if load_more is not None and entry is not None and entry[3] is not None:
+            loaded = load_more(path, entry[1], entry[3])
+        if loaded is None:
+            loaded = load(path)
+        frame, state = loaded if load_more is not None else (loaded, None)
+        size = int(frame.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            self._remove(path)
+            if size <= self.max_bytes:
+                self._entries[path] = (signature, frame, size, state)
+                self._total_bytes += size
+                while self._total_bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                    self._remove(next(iter(self._entries)))
+        return frame
+
+    def invalidate(self, path):
+        with self._lock:
+            self._remove(path)
+
+    def _remove(self, path):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._total_bytes -= entry[2]
+
+
+# Limits can be changed with PANTRY_CACHE_MB and PANTRY_CACHE_ENTRIES. With the compact
+# column types a month of products is small, so a few years of monthly files plus the
+# other datasets fit in the entry limit
+frame_cache = FrameCache(
+    max_bytes=int(float(os.environ.get("PANTRY_CACHE_MB", "256")) * 1024 * 1024),
+    max_entries=int(os.environ.get("PANTRY_CACHE_ENTRIES", "128"))
+)
+
+
+def file_signature(path):
+    # (modification time, size) of a file, which change with every write; None without the file
+    if path is None:
+        return None
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+
+class WalkInMenu:
+    """Today's walk-in menu, kept up to date as products are added and removed.
+
+    The menu is built once a day from today's product rows and removals. After that the
+    storage backend tells it about every product added in tab1/tab2 and every REMOVE
+    click, so showing the menu reads nothing from disk. walk_in_menu.csv is rewritten
+    only when the menu actually changes, for anything else that reads it.
+
+    Entries saved by another process (the standalone API, the bulk import command) are
+    noticed by the signatures of today's two files, and today's rows are read again
+    then. The writer thread passes on this process's own changes to them (file_written),
+    so those never cause a read.
+    """
+
+    def __init__(self, storage):
+        self._storage = storage
+        self._date = None
+        self._products = []  # Every product added today, in the order they came in
+        self._removed = []  # Products marked as out of stock today
+        self._paths = []  # Today's files
+        self._signatures = None  # Of today's files when the menu was last brought up to date
+        self._lock = threading.RLock()
+        # Own changes to today's files, path -> {signature before: signature after}. Kept
+        # under a lock of its own: a session can hold _lock while waiting for the writer
+        self._writes = {}
+        self._writes_lock = threading.Lock()
+
+    def products(self):
+        # Products currently on the menu
+        with self._lock:
+            self._check_date()
+            return self._products_on_menu()
+
+    def removed(self):
+        with self._lock:
+            self._check_date()
+            return list(self._removed)
+
+    def products_added(self, date, products):
+        with self._lock:
+            self._check_date()
+            new_products = [product for product in dict.fromkeys(products)
+                            if date == self._date and product not in self._products]
+            if new_products:
+                self._products.extend(new_products)
+                self._save_menu()
+
+    def remove(self, product, session=""):
+        # Record the removal as a new event in the removed products log
+        with self._lock:
+            self._check_date()
+            if product in self._removed:
+                return
+            self._storage.append("removed_products", {
+                "Product": product,
+                "Date": self._date,
+                "Timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "Session": session
+            })
+            self._removed.append(product)
+            self._save_menu()
+
+    def file_written(self, path, before, after):
+        # Called by the writer thread when this process changed `path` (while holding the
+        # data lock, so nothing else changed it in between)
+        if path in self._paths:
+            with self._writes_lock:
+                self._writes.setdefault(path, {})[before] = after
+
+    def _check_date(self):
+        # Rebuild from the stored data the first time it's used each day, and read today's
+        # rows again when another process changed today's files since
+        today = datetime.today().strftime('%Y-%m-%d')
+        with self._writes_lock:
+            writes, self._writes = self._writes, {}
+        paths = [self._storage.day_file("products", today), self._storage.day_file("removed_products", today)]
+        signatures = [file_signature(path) for path in paths]
+        if self._date == today:
+            # Follow this process's own changes from the last known signatures
+            known = []
+            for path, signature in zip(paths, self._signatures):
+                changes = writes.get(path, {})
+                while signature in changes:
+                    signature = changes.pop(signature)
+                known.append(signature)
+            if known == signatures:
+                self._signatures = signatures
+                return
+        new_day = self._date != today
+        if new_day:
+            self._date, self._products, self._removed = today, [], []
+        self._paths = paths
+        day = datetime.today().date()
+        menu = self._products_on_menu()
+        # Products are only ever added to a day, so what's read is added to what the menu
+        # already has (entries still waiting in the write-behind journal aren't in the files yet)
+        products = self._storage.read_range("products", day, day)["Product"].dropna().unique().tolist()
+        removed = self._storage.read_range("removed_products", day, day)["Product"].unique().tolist()
+        self._products = list(dict.fromkeys(self._products + products))
+        self._removed = list(dict.fromkeys(self._removed + removed))
+        self._signatures = signatures
+        if new_day or self._products_on_menu() != menu:
+            self._save_menu()
+
+    def _products_on_menu(self):
+        return [product for product in self._products if product not in self._removed]
+
+    def _save_menu(self):
+        menu = pd.DataFrame({"Product": self._products_on_menu()})
+        if getattr(self._storage, "write_behind", False):
+            self._storage.replace_later("walk_in_menu", menu)  # Like the entries themselves
+        else:
+            self._storage.replace("walk_in_menu", menu)
+
+
+class CsvStorage:
+    """One CSV file per dataset, stored in `directory`.
+
+    Product data is split into one file per month (product_data/2025-02.csv, ...) so
+    daily work only ever opens the current month, however much history there is.
+    Reading the whole dataset stitches the months back together.
+
+    Append-only logs with a "day_index" keep a small side file with the byte offset of
+    each day's first row, so one day's rows are read with a single seek.
+
+    Datasets with "archive" can have closed months moved to Parquet files under
+    archive/ (see compact and archive.py). read and read_range return the archived
+    months and the CSV rows together.
+    """
+
+    def __init__(self, directory, write_behind=False):
+        self.directory = directory
+        # Latest day's product rows and their key index, see _date_block
+        self._product_block = None
+        # Every write goes through one writer thread, holding this directory's lock file
+        self._writer = WriteCoordinator(os.path.join(directory, ".pantry.lock"))
+        # With write_behind, entries are saved to the journal and written in the background
+        self.write_behind = write_behind
+        self._journal = WriteJournal(os.path.join(directory, ".pantry-journal.jsonl"))
+        # A day's rewrite cut off by a crash is finished before anything reads the month
+        self._writer.apply(finish_block_writes, os.path.join(directory, DATASETS["products"]["partitions"]))
+        if os.path.exists(self.path("products")):
+            self._writer.apply(self._split_legacy_products)
+        self._writer.apply(self._add_missing_columns)
+        # So is archiving cut off by a crash (see _finish_archiving)
+        if archive_available():
+            for name, dataset in DATASETS.items():
+                if dataset.get("archive"):
+                    self._writer.apply(self._finish_archiving, name)
+        self.walk_in_menu = WalkInMenu(self)
+        self.rollups = Rollups(self, os.path.join(directory, "rollups.json"), self._writer.apply)
+        # Entries confirmed before the app last stopped (whether or not write_behind is on now)
+        if os.path.exists(self._journal.path) and os.path.getsize(self._journal.path):
+            self._writer.apply(self._apply_journal)
+        if write_behind:
+            atexit.register(self.flush)
+
+    def path(self, name):
+        return os.path.join(self.directory, DATASETS[name]["file"])
+
+    def partition_path(self, name, month):
+        return os.path.join(self.directory, DATASETS[name]["partitions"], f"{month}.csv")
+
+    def partitions(self, name, first=None, last=None):
+        # Months that have a file, oldest first, optionally limited to first..last
+        try:
+            files = os.listdir(os.path.join(self.directory, DATASETS[name]["partitions"]))
+        except FileNotFoundError:
+            return []
+        months = sorted(file[:-4] for file in files if file.endswith(".csv") and not file.startswith("."))
+        return [month for month in months if (first is None or month >= first) and (last is None or month <= last)]
+
+    def archive_path(self, name, month):
+        return os.path.join(self.directory, ARCHIVE_DIRECTORY, name, f"{month}.parquet")
+
+    def archived_months(self, name, first=None, last=None):
+        # Months in the archive, oldest first, optionally limited to first..last
+        try:
+            files = os.listdir(os.path.join(self.directory, ARCHIVE_DIRECTORY, name))
+        except FileNotFoundError:
+            return []
+        months = sorted(file[:-8] for file in files if file.endswith(".parquet") and not file.startswith("."))
+        return [month for month in months if (first is None or month >= first) and (last is None or month <= last)]
+
+    def location(self, name):
+        if "partitions" in DATASETS[name]:
+            return os.path.join(self.directory, DATASETS[name]["partitions"])
+        return self.path(name)
+
+    def exists(self, name):
+        if self.archived_months(name):
+            return True
+        if "partitions" in DATASETS[name]:
+            return bool(self.partitions(name))
+        return os.path.exists(self.path(name))
+
+    def day_file(self, name, date):
+        # The file dataset `name`'s rows of `date` are added to
+        if "partitions" in DATASETS[name]:
+            return self.partition_path(name, month_of(date))
+        return self.path(name)
+
+    def signature(self, name):
+        # Changes whenever the dataset's files change, used to tell if saved totals are current
+        paths = [self.archive_path(name, month) for month in self.archived_months(name)]
+        if "partitions" in DATASETS[name]:
+            paths += [self.partition_path(name, month) for month in self.partitions(name)]
+        elif os.path.exists(self.path(name)):
+            paths.append(self.path(name))
+        signature = []
+        for path in paths:
+            stat = os.stat(path)
+            signature.append([os.path.basename(path), stat.st_mtime_ns, stat.st_size])
+        return signature
+
+    def read(self, name):
+        archived = [self.archive_path(name, month) for month in self.archived_months(name)]
+        if "partitions" in DATASETS[name]:
+            return self._read_files(name, archived + [self.partition_path(name, month) for month in self.partitions(name)])
+        return self._read_files(name, archived + [self.path(name)])
+
+    def read_range(self, name, start, end):
+        # Archived months the range touches come first, then the rows still in CSV files
+        archived = [self.archive_path(name, month) for month in self.archived_months(name, month_of(start), month_of(end))]
+        if "partitions" in DATASETS[name]:
+            # Only the months the range touches are opened
+            months = self.partitions(name, month_of(start), month_of(end))
+            data = self._read_files(name, archived + [self.partition_path(name, month) for month in months])
+        elif DATASETS[name].get("archive"):
+            data = self._read_files(name, archived + [self.path(name)])
+        elif "day_index" in DATASETS[name] and self.exists(name):
+            data = self._read_days(name, start, end)
+        elif DATASETS[name].get("sorted_by_date") and self.exists(name):
+            data = self._read_sorted_range(name, start, end)
+        else:
+            data = self.read(name)
+        low, high = date_bounds(start, end)
+        dates = data["Date"]
+        if isinstance(dates.dtype, pd.CategoricalDtype):
+            # Compare each different date once, then pick the rows by their date's code
+            # (a missing date has code -1, which lands on the False added at the end)
+            days = dates.cat.categories.astype(str)
+            return data[np.append((days >= low) & (days < high), False)[dates.cat.codes]]
+        dates = dates.astype(str)
+        return data[(dates >= low) & (dates < high)]
+
+    def _read_files(self, name, paths):
+        # Each file is served from the shared cache unless it changed since it was last parsed
+        frames = []
+        for path in paths:
+            try:
+                if path.endswith(".parquet"):
+                    frames.append(frame_cache.get(path, lambda path: read_archive(path, name)))
+                elif DATASETS[name].get("append_only"):
+                    frames.append(frame_cache.get(path, lambda path: read_log_file(path, name),
+                                                  lambda path, data, state: read_appended_rows(path, name, data, state)))
+                else:
+                    frames.append(frame_cache.get(path, lambda path: read_csv_file(path, name)))
+            except FileNotFoundError:
+                pass
+        frames = [frame for frame in frames if not frame.empty] or frames
+        if not frames:
+            return apply_types(name, pd.DataFrame(columns=columns_of(name)))
+        return frames[0] if len(frames) == 1 else concat_frames(frames)
+
+    def _read_days(self, name, start, end):
+        # Seek straight to the first row of `start` and stop before the day after `end`
+        path = self.path(name)
+        low, high = date_bounds(start, end)
+        days = self._day_offsets(name)
+        with open(path, "rb") as f:
+            header = f.readline()
+            size = f.seek(0, os.SEEK_END)
+            first = next((offset for day, offset in days if day >= low), size)
+            last = next((offset for day, offset in days if day >= high), size)
+            f.seek(first)
+            rows = f.read(max(last - first, 0))
+        with span("read day range", file=os.path.basename(path), bytes=len(rows)) as timing:
+            data = read_csv(io.BytesIO(header + rows), name)
+            timing.set(rows=len(data))
+        return data
+
+    def _read_sorted_range(self, name, start, end):
+        # Binary search the date-sorted file for the range and read only those bytes
+        low, high = date_bounds(start, end)
+        date_column = columns_of(name).index("Date")
+        with open(self.path(name), "rb") as f:
+            first = find_date_offset(f, date_column, low)
+            last = find_date_offset(f, date_column, high)
+            f.seek(0)
+            header = f.readline()
+            f.seek(first)
+            rows = f.read(max(last - first, 0))
+        with span("read date range", file=DATASETS[name]["file"], bytes=len(rows)) as timing:
+            data = read_csv(io.BytesIO(header + rows), name)
+            timing.set(rows=len(data))
+        return data
+
+    def _day_offsets(self, name):
+        # [(date, offset)] from the day index, rebuilt from the log if it's missing or stale
+        index_path = os.path.join(self.directory, DATASETS[name]["day_index"])
+        try:
+            with open(index_path, newline="", encoding="utf-8") as f:
+                days = [(day, int(offset)) for day, offset in csv.reader(f)]
+        except (FileNotFoundError, ValueError):
+            days = None
+        if days is None or not self._day_offsets_valid(name, days):
+            days = self._writer.apply(self._rebuild_day_index, name)
+        return days
+
+    def _day_offsets_valid(self, name, days):
+        # The index is trusted if its newest entry still points at a row of that day
+        path = self.path(name)
+        date_column = columns_of(name).index("Date")
+        with open(path, "rb") as f:
+            header_end = len(f.readline())
+            size = f.seek(0, os.SEEK_END)
+            if not days:
+                return size <= header_end
+            day, offset = days[-1]
+            if offset < header_end or offset >= size:
+                return False
+            f.seek(offset)
+            line = f.readline().decode("utf-8")
+        fields = next(csv.reader([line]), [])
+        return len(fields) > date_column and fields[date_column] == day
+
+    def append(self, name, record):
+        check_records(name, [record])
+        if self.write_behind:
+            self._write_behind("append_many", name, [record])
+            return
+        self._writer.apply(self._append, name, record)
+
+    def append_many(self, name, records):
+        # Several rows at once (e.g. a bulk import), written to each file in one go
+        check_records(name, records)
+        if self.write_behind:
+            self._write_behind("append_many", name, records)
+            return
+        self._writer.apply(self._append_many, name, records)
+
+    def replace(self, name, data):
+        data = check_frame(name, data)
+        self._writer.apply(self._replace, name, data)
+
+    def add_distributed(self, date, category, product, count_method, quantity):
+        entry = (date, category, product, count_method, quantity)
+        if self.write_behind:
+            self._write_behind("add_distributed_many", [entry])
+            self.walk_in_menu.products_added(date, [product])  # The menu doesn't wait for the write
+            return
+        self._writer.apply_batched(self._add_distributed_many, entry)
+        self.walk_in_menu.products_added(date, [product])
+
+    def add_distributed_many(self, entries):
+        # (date, category, product, count method, quantity) tuples, one write per month
+        if self.write_behind:
+            self._write_behind("add_distributed_many", entries)
+        else:
+            self._writer.apply(self._add_distributed_many, entries)
+        for date in sorted({entry[0] for entry in entries}):
+            self.walk_in_menu.products_added(date, [entry[2] for entry in entries if entry[0] == date])
+
+    def set_product_left(self, date, category, product, count_method, products_left):
+        if self.write_behind:
+            self._write_behind("set_product_left", date, category, product, count_method, products_left)
+            self.walk_in_menu.products_added(date, [product])
+            return
+        self._writer.apply(self._set_product_left, date, category, product, count_method, products_left)
+        self.walk_in_menu.products_added(date, [product])
+
+    def replace_later(self, name, data):
+        # replace() without waiting for the write, for the walk in menu (which has no totals)
+        data = check_frame(name, data)
+        self._writer.apply_later(self._replace, name, data)
+
+    def flush(self):
+        # Wait until every entry handed in so far is in the data files
+        self._writer.apply(lambda: None)
+
+    def apply_change(self, change, *args):
+        # Run change(*args) on the writer thread, holding the data lock, for modules
+        # that write the data files their own way (see planb_intake.py)
+        return self._writer.apply(change, *args)
+
+    def failed_entries(self):
+        # Journal entries that were confirmed but couldn't be written, see WriteJournal
+        return self._journal.failed()
+
+    def retry_failed(self):
+        # Try the failed journal entries again, returning how many still fail
+        return self._writer.apply(self._retry_failed)
+
+    def discard_failed(self):
+        self._journal.set_failed([])
+
+    def _write_behind(self, operation, *args):
+        # Safe on disk once it's in the journal; the writer thread picks it up from there
+        self._journal.add(operation, *args)
+        self._writer.apply_later(self._apply_journal)
+
+    def compact(self, months):
+        """Move rows older than `months` whole months into the archive.
+
+        Returns {dataset: rows archived}. Safe to run again at any time, including after
+        it was interrupted. The totals don't change, so saved rollups are only stamped
+        with the new files.
+        """
+        if not archive_available():
+            raise RuntimeError("Archiving needs pyarrow (pip install pyarrow)")
+        before = months_before(months)
+        with span("compact", before=before):
+            moved = {name: self._writer.apply(self._compact, name, before)
+                     for name, dataset in DATASETS.items() if dataset.get("archive")}
+        self.rollups.save()
+        return moved
+
+    def schedule_compaction(self, months, every=timedelta(days=1)):
+        # Compact now and then every `every` on a background thread
+        def run():
+            while True:
+                try:
+                    self.compact(months)
+                except Exception as e:
+                    print(f"Compaction failed: {e}", file=sys.stderr)
+                stop.wait(every.total_seconds())
+
+        stop = threading.Event()
+        threading.Thread(target=run, name="pantry-compaction", daemon=True).start()
+        return stop
+
+    # The methods below only run on the writer thread. The ones that change a dataset
+    # also update the totals, so they are never summed in between another write and
+    # its update
+
+    def _apply_journal(self):
+        # Write every journal entry not applied yet, with runs of the same kind of entry
+        # (bursts of submits) written together. The walk in menu was told when the
+        # entries came in (and reads the data when it starts)
+        entries = self._journal.pending()
+        if not entries:
+            return
+        with span("apply journal", entries=len(entries)):
+            position = 0
+            while position < len(entries):
+                operation, args, end = entries[position]
+                run = [args]
+                position += 1
+                # End-of-day counts replace a value, so only additions are run together
+                while (position < len(entries) and entries[position][0] == operation != "set_product_left"
+                       and (operation != "append_many" or entries[position][1][0] == args[0])):
+                    run.append(entries[position][1])
+                    end = entries[position][2]
+                    position += 1
+                try:
+                    self._apply_entries(operation, run)
+                except Exception as e:
+                    # Retrying straight away wouldn't help, so the entries are kept aside for
+                    # someone to look at (see the Diagnostics page)
+                    self._journal.add_failed([{"entry": [operation, args], "error": str(e)} for args in run])
+                # Marked straight away, so a crash later on doesn't write this run again
+                self._journal.mark_applied(end)
+
+    def _retry_failed(self):
+        still_failing = []
+        failures = self._journal.failed()
+        for position, failure in enumerate(failures):
+            # A line that couldn't be read can only be discarded
+            if failure["entry"] is not None:
+                try:
+                    self._apply_entries(failure["entry"][0], [failure["entry"][1]])
+                except Exception as e:
+                    failure = dict(failure, error=str(e))
+                else:
+                    # Taken off the list right away, so a crash can't apply it twice
+                    self._journal.set_failed(still_failing + failures[position + 1:])
+                    continue
+            still_failing.append(failure)
+        self._journal.set_failed(still_failing)
+        return len(still_failing)
+
+    def _apply_entries(self, operation, run):
+        if operation == "append_many":
+            name = run[0][0]
+            records = [record for args in run for record in args[1]]
+            self._append_many(name, records)
+        elif operation == "add_distributed_many":
+            self._add_distributed_many([tuple(entry) for args in run for entry in args[0]])
+        elif operation == "set_product_left":
+            self._set_product_left(*run[0])
+        else:
+            raise ValueError(f"Unknown journal entry: {operation}")
+
+    def _append(self, name, record):
+        self._append_many(name, [record])
+
+    def _append_many(self, name, records):
+        self.rollups.dataset_changing(name)
+        if "partitions" in DATASETS[name]:
+            by_path = {}
+            for record in records:
+                by_path.setdefault(self.partition_path(name, month_of(record["Date"])), []).append(record)
+        else:
+            by_path = {self.path(name): records}
+        for path, path_records in by_path.items():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if "day_index" in DATASETS[name] and os.path.exists(path):
+                days = self._day_offsets(name)
+            else:
+                days = []
+            with self._writing(path):
+                offsets = append_records(path, path_records, columns_of(name))
+            if not DATASETS[name].get("append_only"):
+                frame_cache.invalidate(path)  # Append-only files are caught up by the cache instead
+            if "day_index" not in DATASETS[name]:
+                continue
+            # First row of each new day: remember where it starts
+            last_day = days[-1][0] if days else None
+            new_days = []
+            for record, offset in zip(path_records, offsets):
+                if record["Date"] != last_day:
+                    new_days.append([record["Date"], offset])
+                    last_day = record["Date"]
+            with open(os.path.join(self.directory, DATASETS[name]["day_index"]), "a", newline="", encoding="utf-8") as f:
+                csv.writer(f, lineterminator="\n").writerows(new_days)
+        self.rollups.records_added(name, records)
+
+    @contextmanager
+    def _writing(self, path):
+        # Pass this process's change to `path` on to the walk in menu, see WalkInMenu
+        before = file_signature(path)
+        yield
+        self.walk_in_menu.file_written(path, before, file_signature(path))
+
+    def _rebuild_day_index(self, name):
+        # Scan the log once and write down where each day starts
+        path = self.path(name)
+        date_column = columns_of(name).index("Date")
+        days = []
+        with open(path, "rb") as f:
+            offset = len(f.readline())
+            for line in f:
+                fields = next(csv.reader([line.decode("utf-8")]), [])
+                if len(fields) > date_column and (not days or days[-1][0] != fields[date_column]):
+                    days.append((fields[date_column], offset))
+                offset += len(line)
+        index_path = os.path.join(self.directory, DATASETS[name]["day_index"])
+        write_csv_atomic(index_path, pd.DataFrame(days, columns=["Date", "Offset"]), header=False)
+        return days
+
+    def _add_missing_columns(self):
+        # Files written before a column was added get it (empty) so new rows can be appended
+        for name, dataset in DATASETS.items():
+            path = self.path(name)
+            if "partitions" in dataset or not os.path.exists(path):
+                continue
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                existing_columns = next(csv.reader(f), [])
+            if existing_columns != columns_of(name) and set(existing_columns) < set(columns_of(name)):
+                data = read_csv(path, name, compact=False, check_columns=False)
+                self._write_file(path, data.reindex(columns=columns_of(name)))
+
+    def _replace(self, name, data):
+        self.rollups.dataset_changing(name)
+        if self.archived_months(name):
+            data = self._replace_archived(name, data)
+        if "partitions" not in DATASETS[name]:
+            self._write_file(self.path(name), data)
+        else:
+            # Write every month in `data` and drop the months it no longer has
+            months = data["Date"].astype(str).str[:7]
+            for month, rows in data.groupby(months, sort=True):
+                self._write_file(self.partition_path(name, month), rows)
+            for month in set(self.partitions(name)) - set(months):
+                os.remove(self.partition_path(name, month))
+                frame_cache.invalidate(self.partition_path(name, month))
+        self.rollups.dataset_replaced(name)
+
+    def _replace_archived(self, name, data):
+        # Rows of archived months are written back to their archive file and archived
+        # months `data` no longer has are dropped. The other rows are returned, for the CSV files
+        archived = set(self.archived_months(name))
+        months = data["Date"].astype(str).str[:7]
+        in_archive = months.isin(archived)
+        for month, rows in data[in_archive].groupby(months[in_archive], sort=True):
+            # The batches are kept, for a file that was being archived (see _finish_archiving)
+            path = self.archive_path(name, month)
+            write_archive(path, rows, archived_batches(path))
+            frame_cache.invalidate(path)
+        for month in archived - set(months[in_archive]):
+            os.remove(self.archive_path(name, month))
+            frame_cache.invalidate(self.archive_path(name, month))
+        return data[~in_archive]
+
+    def _write_file(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_csv_atomic(path, data)
+        frame_cache.invalidate(path)
+        # A rewritten log needs its day index built again
+        for dataset in DATASETS.values():
+            if "day_index" in dataset and path == os.path.join(self.directory, dataset["file"]):
+                index_path = os.path.join(self.directory, dataset["day_index"])
+                if os.path.exists(index_path):
+                    os.remove(index_path)
+
+    def _compact(self, name, before):
+        # Set aside every file with rows before `before`, then archive them
+        self.rollups.dataset_changing(name)
+        if "partitions" in DATASETS[name]:
+            for month in [month for month in self.partitions(name) if month < before]:
+                path = self.partition_path(name, month)
+                os.rename(path, self._archiving_path(path, before))
+                frame_cache.invalidate(path)
+        elif os.path.exists(self.path(name)):
+            # Linked, so the file keeps serving its recent rows until they're written out
+            os.link(self.path(name), self._archiving_path(self.path(name), before))
+        moved = self._finish_archiving(name)
+        self.rollups.rows_moved(name)
+        return moved
+
+    def _archiving_path(self, path, before):
+        # Where a file is set aside for archiving, with an id of its own
+        directory, file = os.path.split(path)
+        return os.path.join(directory, f".{file}.{before}.{uuid.uuid4().hex}.archiving")
+
+    def _finish_archiving(self, name):
+        """Archive the rows of every file of `name` set aside by _compact and remove it.
+
+        A month's file is renamed to .<file>.<before>.<id>.archiving. The single file of
+        the other datasets is hard linked under that name, and its rows from before
+        `before` are then written out of it. Every batch of rows added to an archive file
+        records the id, so after a crash at any point the rest of the move is finished
+        without adding a row twice. Returns how many rows were archived.
+        """
+        partitioned = "partitions" in DATASETS[name]
+        directory = self.location(name) if partitioned else self.directory
+        try:
+            files = sorted(os.listdir(directory))
+        except FileNotFoundError:
+            return 0
+        moved = 0
+        for file in files:
+            if not (file.startswith(".") and file.endswith(".archiving")):
+                continue
+            source, before, generation = file[1:-len(".archiving")].rsplit(".", 2)
+            if not partitioned and source != DATASETS[name]["file"]:
+                continue
+            archiving_path = os.path.join(directory, file)
+            data = read_csv_file(archiving_path, name, compact=False)
+            if partitioned:
+                groups = [(source[:-len(".csv")], data)]
+            else:
+                # Rows without a proper date always stay in the CSV file
+                dated = pd.to_datetime(data["Date"], format="%Y-%m-%d", errors="coerce").notna()
+                months = data["Date"].astype(str).str[:7]
+                old = dated & (months < before)
+                path = self.path(name)
+                if old.any() and os.path.exists(path) and os.path.samefile(path, archiving_path):
+                    self._write_file(path, data[~old])  # Swaps in a new file, the linked one stays as it was
+                groups = data[old].groupby(months[old], sort=True)
+            for month, rows in groups:
+                moved += self._archive_rows(name, month, rows.reset_index(drop=True), generation)
+            os.remove(archiving_path)
+        return moved
+
+    def _archive_rows(self, name, month, rows, source):
+        # Add `rows` (read from the file with id `source`) to the month's archive file,
+        # unless an interrupted compaction already did. Returns how many rows were added
+        path = self.archive_path(name, month)
+        batches = archived_batches(path)
+        if rows.empty or already_archived(source, batches):
+            return 0
+        if os.path.exists(path):
+            data = pd.concat([read_archive(path, name, compact=False), rows], ignore_index=True)
+        else:
+            data = rows
+        if "partitions" in DATASETS[name]:
+            data = merge_product_rows(data)  # A late entry for an archived month joins its row
+        write_archive(path, data, batches + [{"source": source, "rows": len(rows)}])
+        frame_cache.invalidate(path)
+        return len(rows)
+
+    def _split_legacy_products(self):
+        # One-time move of the old single product_data.csv into monthly files. The old
+        # file is only renamed once every month is written, so an interrupted split is
+        # simply done again on the next start
+        legacy_path = self.path("products")
+        if not os.path.exists(legacy_path):
+            return
+        data = read_csv(legacy_path, "products", compact=False)
+        months = data["Date"].astype(str).str[:7]
+        for month, rows in data.groupby(months, sort=True):
+            self._write_file(self.partition_path("products", month), rows.sort_values("Date", kind="stable"))
+        os.replace(legacy_path, legacy_path + ".migrated")
+
+    def _date_block(self, date):
+        """Return `date`'s product rows with a (Date, Category, Product) index over them.
+
+        Each month's file is kept sorted by date, so all of a day's rows sit in one block
+        at its end and only that block is read. It is kept in memory until the file
+        changes on disk. Returns None for a back-dated entry or a file with unexpected
+        columns, in which case the caller has to work on the whole month.
+        """
+        path = self.partition_path("products", month_of(date))
+        stat = os.stat(path)
+        signature = (path, date, stat.st_mtime_ns, stat.st_size)
+        if self._product_block is not None and self._product_block["signature"] == signature:
+            return self._product_block
+
+        header, offset, lines, last_date = read_date_block(path, date)
+        header_columns = next(csv.reader([header.decode("utf-8-sig")]), [])
+        if header_columns != columns_of("products") or (last_date is not None and last_date > date):
+            return None
+
+        # These rows get changed and written back, so they're read with exact numbers
+        rows = read_csv(io.BytesIO(header + b"\n".join(lines)), "products", compact=False)
+        self._product_block = {"signature": signature, "offset": offset, "rows": rows, "index": key_index(rows)}
+        return self._product_block
+
+    def _write_date_block(self, date, block, rows):
+        # Rewrite only the day's block and remember what was written
+        path = self.partition_path("products", month_of(date))
+        write_from_offset(path, block["offset"], rows)
+        frame_cache.invalidate(path)
+        stat = os.stat(path)
+        self._product_block = {"signature": (path, date, stat.st_mtime_ns, stat.st_size), "offset": block["offset"],
+                               "rows": rows, "index": key_index(rows)}
+
+    def _month_rows(self, month):
+        try:
+            return read_csv_file(self.partition_path("products", month), "products", compact=False)
+        except FileNotFoundError:
+            return pd.DataFrame(columns=columns_of("products"))
+
+    def _add_distributed_many(self, entries):
+        # `entries` are (date, category, product, count method, quantity) tuples, merged
+        # into each month they belong to with one groupby and one write
+        self.rollups.dataset_changing("products")
+        new_rows = [new_product_row(*entry) for entry in entries]
+        for month in sorted({month_of(row["Date"]) for row in new_rows}):
+            month_rows = [row for row in new_rows if month_of(row["Date"]) == month]
+            path = self.partition_path("products", month)
+            dates = {row["Date"] for row in month_rows}
+            block = self._date_block(dates.pop()) if os.path.exists(path) and len(dates) == 1 else None
+            with self._writing(path):
+                if block is None:
+                    # Merge the whole month
+                    self._write_file(path, merge_product_rows(add_rows(self._month_rows(month), month_rows)))
+                else:
+                    self._write_date_block(month_rows[0]["Date"], block,
+                                           merge_product_rows(add_rows(block["rows"], month_rows)))
+        # Adding to a record raises its total by the same amount, so the totals just add
+        # the new rows instead of summing the day again
+        self.rollups.records_added("products", new_rows)
+
+    def _set_product_left(self, date, category, product, count_method, products_left):
+        self.rollups.dataset_changing("products")
+        path = self.partition_path("products", month_of(date))
+        block = self._date_block(date) if os.path.exists(path) else None
+        with self._writing(path):
+            if block is None:
+                # Work on the whole month, keeping it sorted by date for the next block lookup
+                data = self._month_rows(month_of(date))
+                data = set_product_left_in(data, key_index(data), date, category, product, count_method, products_left)
+                self._write_file(path, data.sort_values("Date", kind="stable"))
+            else:
+                self._write_date_block(date, block, set_product_left_in(block["rows"], block["index"], date, category,
+                                                                        product, count_method, products_left))
+        self.rollups.day_changed("products", date)
+
+
+class SqliteStorage:
+    """One table per dataset in a single SQLite database, with indexes for lookups."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.walk_in_menu = WalkInMenu(self)
+        # Totals are summed from the indexed tables when first needed, not saved separately
+        self.rollups = Rollups(self)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for name, dataset in DATASETS.items():
+                column_sql = ", ".join(f"{quote(column)} {sql_type(name, column)}" for column in dataset["columns"])
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {quote(name)} ({column_sql})")
+                # Tables created before a column was added get it now
+                existing_columns = {row[1] for row in conn.execute(f"PRAGMA table_info({quote(name)})")}
+                for column in dataset["columns"]:
+                    if column not in existing_columns:
+                        conn.execute(f"ALTER TABLE {quote(name)} ADD COLUMN {quote(column)} {sql_type(name, column)}")
+                if dataset["index"]:
+                    index_sql = ", ".join(quote(column) for column in dataset["index"])
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {quote('idx_' + name)} ON {quote(name)} ({index_sql})")
+
+    @contextmanager
+    def _connect(self):
+        # Streamlit runs every session on its own thread, so each call opens its own connection.
+        # The transaction is committed when the block finishes (or rolled back on an error)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def location(self, name):
+        return f"{self.db_path} (table '{name}')"
+
+    def exists(self, name):
+        with self._connect() as conn:
+            return conn.execute(f"SELECT 1 FROM {quote(name)} LIMIT 1").fetchone() is not None
+
+    def read(self, name):
+        column_sql = ", ".join(quote(column) for column in columns_of(name))
+        with span("sqlite read", table=name) as timing, self._connect() as conn:
+            data = pd.read_sql_query(f"SELECT {column_sql} FROM {quote(name)} ORDER BY rowid", conn)
+            timing.set(rows=len(data))
+        return apply_types(name, data)
+
+    def read_range(self, name, start, end):
+        column_sql = ", ".join(quote(column) for column in columns_of(name))
+        with span("sqlite read range", table=name) as timing, self._connect() as conn:
+            data = pd.read_sql_query(
+                f'SELECT {column_sql} FROM {quote(name)} WHERE "Date" >= ? AND "Date" < ? ORDER BY rowid',
+                conn, params=date_bounds(start, end)
+            )
+            timing.set(rows=len(data))
+        return apply_types(name, data)
+
+    def signature(self, name):
+        return None  # Totals aren't saved for the database, see __init__
+
+    def day_file(self, name, date):
+        return None  # No file to watch, so the walk in menu only sees this process's inserts
+
+    def append(self, name, record):
+        check_records(name, [record])
+        self._insert(name, [record])
+        self.rollups.record_added(name, record)
+
+    def append_many(self, name, records):
+        check_records(name, records)
+        self._insert(name, records)
+        self.rollups.records_added(name, records)
+
+    def replace(self, name, data):
+        data = check_frame(name, data)
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {quote(name)}")
+            self._insert(name, data.to_dict("records"), conn)
+        self.rollups.dataset_replaced(name)
+
+    def add_distributed(self, date, category, product, count_method, quantity):
+        entry = (date, category, product, count_method, quantity)
+        self._add_distributed_many([entry])
+        distributed_entries_added(self, [entry])
+
+    def add_distributed_many(self, entries):
+        self._add_distributed_many(entries)
+        distributed_entries_added(self, entries)
+
+    def set_product_left(self, date, category, product, count_method, products_left):
+        self._set_product_left(date, category, product, count_method, products_left)
+        self.walk_in_menu.products_added(date, [product])
+        self.rollups.day_changed("products", date)
+
+    def _add_distributed_many(self, entries):
+        # Find each record through the product index and add to it; duplicate rows with the
+        # same key are folded into the first one, like the groupby in the CSV backend. All
+        # entries go in one transaction
+        key_sql = " AND ".join(f"{quote(column)} = ?" for column in PRODUCT_KEY)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for date, category, product, count_method, quantity in entries:
+                key = [date, category, product, count_method]
+                rows = conn.execute(
+                    f'SELECT rowid, "Product Distributed", "Product Left", "Total Product Distributed" '
+                    f'FROM "products" WHERE {key_sql} ORDER BY rowid', key
+                ).fetchall()
+                if not rows:
+                    self._insert("products", [new_product_row(date, category, product, count_method, quantity)], conn)
+                    continue
+                distributed = sum(row[1] or 0 for row in rows) + quantity
+                left = sum(row[2] or 0 for row in rows)
+                total = sum(row[3] or 0 for row in rows) + quantity
+                conn.execute(
+                    'UPDATE "products" SET "Product Distributed" = ?, "Product Left" = ?, '
+                    '"Total Product Distributed" = ? WHERE rowid = ?',
+                    (distributed, left, total, rows[0][0])
+                )
+                if len(rows) > 1:
+                    conn.executemany('DELETE FROM "products" WHERE rowid = ?', [(row[0],) for row in rows[1:]])
+
+    def _set_product_left(self, date, category, product, count_method, products_left):
+        # Same rules as set_product_left_in, with the rows found through the product index
+        key = [date, category, product, count_method]
+        key_sql = " AND ".join(f"{quote(column)} = ?" for column in PRODUCT_KEY)
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                f'SELECT rowid, "Product Distributed" FROM "products" WHERE {key_sql} ORDER BY rowid', key
+            ).fetchall()
+            if not rows:
+                self._insert("products", [new_product_row(date, category, product, count_method, 0, products_left)], conn)
+                return
+            distributed = sum(row[1] or 0 for row in rows)
+            conn.execute(
+                'UPDATE "products" SET "Product Distributed" = ?, "Product Left" = ?, '
+                '"Total Product Distributed" = ? WHERE rowid = ?',
+                (distributed, products_left, distributed - products_left, rows[0][0])
+            )
+            if len(rows) > 1:
+                conn.executemany('DELETE FROM "products" WHERE rowid = ?', [(row[0],) for row in rows[1:]])
+
+    def _insert(self, name, records, conn=None):
+        columns = columns_of(name)
+        sql = (f"INSERT INTO {quote(name)} ({', '.join(quote(column) for column in columns)}) "
+               f"VALUES ({', '.join('?' for _ in columns)})")
+        rows = [[to_sql_value(record.get(column)) for column in columns] for record in records]
+        with span("sqlite insert", table=name, rows=len(rows)):
+            if conn is None:
+                with self._connect() as conn:
+                    conn.executemany(sql, rows)
+            else:
+                conn.executemany(sql, rows)
+
+    def import_frame(self, name, data):
+        # Skip tables that already have data so running the migration twice is harmless
+        if self.exists(name) or data.empty:
+            return 0
+        data = data.reindex(columns=columns_of(name))
+        self._insert(name, data.to_dict("records"))
+        return len(data)
+
+
+def distributed_entries_added(storage, entries):
+    # Let the walk in menu and the totals know about distributed entries. Adding to a
+    # record raises its total by the same amount, so the totals just add the new rows
+    # instead of summing the day again
+    for date in sorted({entry[0] for entry in entries}):
+        storage.walk_in_menu.products_added(date, [entry[2] for entry in entries if entry[0] == date])
+    storage.rollups.records_added("products", [new_product_row(*entry) for entry in entries])
+
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def to_sql_value(value):
+    # pandas gives NaN for empty cells and numpy scalars for numbers; sqlite3 wants plain Python values
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, np.float32):
+        return float(str(value))  # 2.1, not the 2.0999999046325684 float32 really holds
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def migrate_csv_to_sqlite(csv_directory, db_path):
+    """Import every dataset's CSV into the SQLite database, returning the rows added per table."""
+    files = CsvStorage(csv_directory)
+    database = SqliteStorage(db_path)
+    return {name: database.import_frame(name, files.read(name)) for name in DATASETS}
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Return the storage backend shared by every session on this server."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            backend = os.environ.get("PANTRY_STORAGE", "csv").lower()
+            if backend == "sqlite":
+                _storage = SqliteStorage(os.environ.get("PANTRY_DB", os.path.join(current_directory, "pantry.db")))
+            elif backend == "csv":
+                _storage = CsvStorage(current_directory, os.environ.get("PANTRY_WRITE_BEHIND", "") == "1")
+                # Keep only the last PANTRY_ARCHIVE_MONTHS months in the CSV files, checked daily
+                if os.environ.get("PANTRY_ARCHIVE_MONTHS") and archive_available():
+                    _storage.schedule_compaction(int(os.environ["PANTRY_ARCHIVE_MONTHS"]))
+            else:
+                raise ValueError(f"Unknown PANTRY_STORAGE backend: {backend}")
+        return _storage
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["migrate"]:
+        db_path = os.environ.get("PANTRY_DB", os.path.join(current_directory, "pantry.db"))
+        for name, count in migrate_csv_to_sqlite(current_directory, db_path).items():
+            print(f"{name}: {count} rows imported")
+    elif sys.argv[1:2] == ["compact"] and len(sys.argv) <= 3:
+        months = int(sys.argv[2]) if len(sys.argv) == 3 else int(os.environ.get("PANTRY_ARCHIVE_MONTHS", 12))
+        for name, count in CsvStorage(current_directory).compact(months).items():
+            print(f"{name}: {count} rows archived")
+    else:
+        print("usage: python storage.py migrate | compact [MONTHS]")
+        sys.exit(1)
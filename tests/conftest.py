@@ -0,0 +1,5 @@
+# The app's modules live in the repository folder, not in an installed package
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
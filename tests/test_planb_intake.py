@@ -0,0 +1,41 @@
+# Plan B intake: shards cut off by a crash must not hold up the other responses
+import os
+
+from planb_intake import PlanBIntake
+from storage import CsvStorage
+
+
+def response(second, barrier="Cost"):
+    return {"Date": f"2026-10-18 12:00:{second:02d}", "Age": 20, "Gender Identity": "Female",
+            "Racial Background": "Asian", "Financial Background": "Yes", "Annual Income": 100,
+            "Barrier From Obtaining Plan B": barrier}
+
+
+def test_merge_sets_aside_a_torn_shard_line(tmp_path):
+    data = CsvStorage(str(tmp_path))
+    intake = PlanBIntake(data)
+    intake.submit(response(1, "Other: first line\nsecond line"))
+    shard = os.path.join(intake.shard_directory, "shard-0.jsonl")
+    with open(shard, "r+b") as f:
+        f.truncate(os.path.getsize(shard) - 7)  # The submit is cut off by a crash
+    intake.submit(response(2))
+    intake.submit(response(3, "Cost, Other: a\nb"))
+
+    assert intake.merge() == 2
+    assert intake.rejected() == 1
+    assert data.read("planB")["Barrier From Obtaining Plan B"].tolist() == ["Cost", "Cost, Other: a\nb"]
+    assert not [file for file in os.listdir(intake.shard_directory) if file.endswith(".claimed")]
+
+    intake.submit(response(4))
+    assert intake.merge() == 1
+    assert intake.stats()[0] == 3
+
+
+def test_merge_sets_aside_a_line_that_is_not_a_response(tmp_path):
+    data = CsvStorage(str(tmp_path))
+    intake = PlanBIntake(data)
+    with open(os.path.join(intake.shard_directory, "shard-5.jsonl"), "w") as f:
+        f.write('["2026-10-18 12:00:01", 20]\nnot json\n')
+    intake.submit(response(2))
+    assert intake.merge() == 1
+    assert intake.rejected() == 2
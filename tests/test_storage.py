@@ -0,0 +1,180 @@
+# Failure paths of the CSV storage: torn writes, crashes halfway and reopening after them
+import os
+import stat
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import storage
+from storage import CsvStorage, WriteJournal, append_records, read_csv_file, write_from_offset
+
+COLUMNS = ["Date", "Product", "Quantity"]
+
+
+def donation(day, weight):
+    return {"Date": day, "Product Name": "Canned", "Donation Weight (lbs)": weight, "Donation Provider": "Other"}
+
+
+def test_append_records_writes_header_once_and_returns_offsets(tmp_path):
+    path = tmp_path / "log.csv"
+    first = append_records(str(path), [{"Date": "2025-02-01", "Product": "Rice", "Quantity": 1}], COLUMNS)
+    more = append_records(str(path), [{"Date": "2025-02-02", "Product": "Beans", "Quantity": 2},
+                                      {"Date": "2025-02-03", "Product": "Kale", "Quantity": 3}], COLUMNS)
+    content = path.read_bytes()
+    assert content.count(b"Date,Product,Quantity") == 1
+    for offset, product in zip(first + more, [b"2025-02-01,Rice", b"2025-02-02,Beans", b"2025-02-03,Kale"]):
+        assert content[offset:].startswith(product)
+
+
+def test_append_records_starts_a_new_line_after_a_torn_one(tmp_path):
+    path = tmp_path / "log.csv"
+    path.write_bytes(b"Date,Product,Quantity\n2025-02-01,Ri")
+    append_records(str(path), [{"Date": "2025-02-02", "Product": "Beans", "Quantity": 2}], COLUMNS)
+    assert path.read_bytes().splitlines()[-1] == b"2025-02-02,Beans,2"
+
+
+def test_append_records_refuses_other_columns(tmp_path):
+    path = tmp_path / "log.csv"
+    path.write_text("Wrong,Header\n")
+    with pytest.raises(ValueError):
+        append_records(str(path), [{"Date": "2025-02-01"}], COLUMNS)
+    assert path.read_text() == "Wrong,Header\n"
+
+
+def test_rewrites_keep_file_permissions(tmp_path):
+    data = CsvStorage(str(tmp_path))
+    data.replace("walk_in_menu", pd.DataFrame({"Product": ["Rice"]}))
+    os.chmod(data.path("walk_in_menu"), 0o644)
+    data.replace("walk_in_menu", pd.DataFrame({"Product": ["Beans"]}))
+    assert stat.S_IMODE(os.stat(data.path("walk_in_menu")).st_mode) == 0o644
+
+
+def test_torn_day_block_rewrite_is_finished_on_reopen(tmp_path, monkeypatch):
+    data = CsvStorage(str(tmp_path))
+    data.add_distributed("2025-02-01", "Grains", "Rice", "Individual", 1.0)
+    data.add_distributed("2025-02-02", "Grains", "Rice", "Individual", 2.0)
+    path = data.partition_path("products", "2025-02")
+
+    def torn_write(file_path, offset, block):
+        # The crash hits halfway through writing the new block
+        with open(file_path, "r+b") as f:
+            f.seek(offset)
+            f.write(block[:len(block) // 2])
+            f.truncate()
+        raise SystemExit("crash")
+
+    monkeypatch.setattr(storage, "write_at", torn_write)
+    with pytest.raises(SystemExit):
+        write_from_offset(path, data._date_block("2025-02-02")["offset"],
+                          pd.DataFrame([storage.new_product_row("2025-02-02", "Grains", "Rice", "Individual", 5.0)]))
+    monkeypatch.undo()
+
+    rows = read_csv_file(CsvStorage(str(tmp_path)).partition_path("products", "2025-02"), "products")
+    assert rows["Product Distributed"].tolist() == [1.0, 5.0]
+    assert not [file for file in os.listdir(os.path.dirname(path)) if ".block-" in file]
+
+
+def journal_entry(product, quantity):
+    return [["2026-10-18", "Produce", product, "Individual", quantity]]
+
+
+def test_journal_entry_after_a_torn_line_is_replayed(tmp_path):
+    journal = WriteJournal(str(tmp_path / ".pantry-journal.jsonl"))
+    journal.add("add_distributed_many", journal_entry("Apples", 1.0))
+    journal.add("add_distributed_many", journal_entry("Apples", 2.0))
+    with open(journal.path, "r+b") as f:
+        f.truncate(os.path.getsize(journal.path) - 10)  # The second entry is cut off by a crash
+    journal.add("add_distributed_many", journal_entry("Pears", 4.0))
+
+    data = CsvStorage(str(tmp_path))
+    totals = data.read("products").groupby("Product", observed=True)["Product Distributed"].sum()
+    assert totals.to_dict() == {"Apples": 1.0, "Pears": 4.0}
+    failed = data.failed_entries()
+    assert len(failed) == 1 and failed[0]["entry"] is None
+    assert os.path.getsize(journal.path) == 0
+
+
+def test_journal_with_only_a_torn_line_opens(tmp_path):
+    journal = WriteJournal(str(tmp_path / ".pantry-journal.jsonl"))
+    journal.add("add_distributed_many", journal_entry("Apples", 1.0))
+    with open(journal.path, "r+b") as f:
+        f.truncate(os.path.getsize(journal.path) - 3)
+    data = CsvStorage(str(tmp_path))
+    assert data.read("products").empty
+    assert len(data.failed_entries()) == 1
+
+
+def test_failed_journal_entry_is_kept_until_retried(tmp_path):
+    (tmp_path / "menstrual_products.csv").write_text("Wrong,Header\n")
+    data = CsvStorage(str(tmp_path), write_behind=True)
+    data.append("menstrual", {"Date": "2026-10-18 10:00:00", "Brand": "A", "Product Type": "Pad", "Quantity": 2})
+    data.flush()
+    assert [failure["entry"][0] for failure in data.failed_entries()] == ["append_many"]
+
+    assert data.retry_failed() == 1  # The file still has the wrong columns
+    os.remove(tmp_path / "menstrual_products.csv")
+    assert data.retry_failed() == 0
+    assert len(data.read("menstrual")) == 1
+    assert data.failed_entries() == []
+
+
+@pytest.fixture
+def archiving(tmp_path):
+    pytest.importorskip("pyarrow")
+    data = CsvStorage(str(tmp_path))
+    data.append("donated", donation("2024-03-01", 5.0))
+    data.append("donated", donation(date.today().isoformat(), 2.0))
+    data.add_distributed("2024-03-02", "Grains", "Rice", "Individual", 3.0)
+    data.compact(12)
+    return data
+
+
+def test_identical_late_entries_are_all_archived(archiving):
+    for _ in range(2):
+        archiving.append("donated", donation("2024-03-04", 1.0))
+        archiving.add_distributed("2024-03-05", "Grains", "Rice", "Individual", 1.0)
+        assert archiving.compact(12) == {"products": 1, "donated": 1, "spoiled": 0}
+    assert archiving.read("donated")["Donation Weight (lbs)"].sum() == 9.0
+    assert archiving.read("products")["Product Distributed"].sum() == 5.0
+    totals = archiving.rollups.table("Donation Weight (lbs) by Provider", "Monthly")
+    assert totals["Value"].sum() == 9.0
+
+
+def test_archiving_cut_off_by_a_crash_is_finished_once(archiving, monkeypatch):
+    archiving.append("donated", donation("2024-03-04", 1.0))
+    remove = os.remove
+
+    def crash_before_cleanup(path):
+        if str(path).endswith(".archiving"):
+            raise SystemExit("crash")
+        remove(path)
+
+    monkeypatch.setattr(os, "remove", crash_before_cleanup)
+    with pytest.raises(SystemExit):
+        archiving.compact(12)
+    monkeypatch.undo()
+    # Another identical late entry comes in before the app is started again
+    archiving.append("donated", donation("2024-03-04", 1.0))
+
+    reopened = CsvStorage(archiving.directory)
+    assert not [file for file in os.listdir(reopened.directory) if file.endswith(".archiving")]
+    assert reopened.read("donated")["Donation Weight (lbs)"].sum() == 9.0
+    reopened.compact(12)
+    assert reopened.read("donated")["Donation Weight (lbs)"].sum() == 9.0
+    assert len(read_csv_file(reopened.path("donated"), "donated")) == 1  # Only today's row stays in the CSV
+
+
+def test_archiving_cut_off_before_the_csv_was_rewritten(archiving, monkeypatch):
+    archiving.append("donated", donation("2024-03-04", 1.0))
+
+    def crash(*args):
+        raise SystemExit("crash")
+
+    monkeypatch.setattr(archiving, "_write_file", crash)
+    with pytest.raises(SystemExit):
+        archiving.compact(12)
+
+    reopened = CsvStorage(archiving.directory)
+    assert reopened.read("donated")["Donation Weight (lbs)"].sum() == 8.0
+    assert len(read_csv_file(reopened.path("donated"), "donated")) == 1